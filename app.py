@@ -1,13 +1,15 @@
-# Crear el archivo app.py mejorado con clasificación HOT/WARM/COLD y valor esperado
-
-# CELDA 2: Crear el archivo app.py
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-from sklearn.preprocessing import StandardScaler
-import os
 import datetime
+import io
+
+from predictor_pool import PredictorPool
+from reports import export_report, summarize
+from scoring import (COMISION_ESTIMADA, OPCIONES_SIDEBAR, RANGOS_SIDEBAR, expected_value, model_signature,
+                     model_version, preprocess_batch)
+from explain import FeatureExplainer
+from thresholds import load_thresholds, rank_leads, thresholds_mtime
 
 # Configuración de la página
 st.set_page_config(
@@ -88,32 +90,69 @@ st.markdown("---")
 
 # Cargar el modelo y preprocesadores
 @st.cache_resource
-def load_model():
+def load_pool():
+    # Modelos por proyecto (modelos/<PROYECTO>/) con el global como respaldo
+    return PredictorPool()
+
+def load_model(proyecto=None):
     try:
-        # Cargar modelo y preprocesadores
-        model = joblib.load('mejor_modelo.pkl')
-        scaler = joblib.load('scaler.pkl')
-        columnas = joblib.load('columnas_modelo.pkl')
-        
-        # Cargar label encoders
-        label_encoders = {}
-        for col in ['proyecto', 'manzana', 'lote_ubicacion']:
-            try:
-                label_encoders[col] = joblib.load(f'label_encoder_{col}.pkl')
-            except:
-                label_encoders[col] = None
-        
-        return model, scaler, columnas, label_encoders
+        return load_pool().get(proyecto)
     except Exception as e:
         st.error(f"Error cargando el modelo: {e}")
         return None, None, None, None
 
+@st.cache_resource
+def _load_umbrales(directorio, firma_modelo, mtime):
+    return load_thresholds(directorio)
+
+def load_umbrales(directorio='.'):
+    # Umbrales calibrados para la versión actual del modelo (o los fijos 0.7/0.4);
+    # la firma del modelo y la fecha del JSON entran en la clave, igual que el pool
+    # recarga un modelo reentrenado, para no aplicar umbrales de otra versión
+    return _load_umbrales(directorio, model_signature(directorio), thresholds_mtime(directorio))
+
+def load_schema(proyecto=None):
+    # Esquema de validación derivado de columnas_modelo y del scaler; vive en el pool
+    # junto al bundle del modelo y se descarta con él
+    return load_pool().schema(proyecto)
+
+def load_explainer(proyecto=None):
+    # Se construye una sola vez por modelo y se descarta con el bundle en el LRU del pool
+    return load_pool().explainer(proyecto)
+
+def artifacts_key():
+    # Versión de cada modelo y fecha de sus umbrales: cambia si se reentrena o recalibra;
+    # el pool recarga por su cuenta un mejor_modelo.pkl que cambió en disco
+    return tuple((d, model_version(d), thresholds_mtime(d)) for d in load_pool().directories())
+
+@st.cache_data(show_spinner="Puntuando lote...")
+def build_batch_report(contenido, version_modelos, top_n=20):
+    # Valida el lote contra el esquema de cada modelo y descarta los leads que no pueden
+    # puntuarse bien (vacíos, no numéricos, categorías desconocidas); el resto se puntúa y
+    # explica en una sola pasada por modelo. version_modelos solo forma parte de la clave de caché
+    pool = load_pool()
+    leads = pd.read_csv(io.BytesIO(contenido))
+    validacion = pool.validate(leads)
+    puntuados, contribuciones = pool.score(leads[validacion.scorable_mask()], explain=True)
+    
+    rankings = [rank_leads(grupo, load_umbrales(directorio))
+                for directorio, grupo in puntuados.groupby('modelo_dir')]
+    ranking = pd.concat(rankings) if rankings else rank_leads(puntuados, load_umbrales())
+    
+    resumen = summarize(ranking, contribuciones, top_n)
+    resumen['validacion'] = validacion.summary()
+    resumen['drift'] = pool.drift(leads)
+    return resumen
+
 # Cargar recursos
 model, scaler, columnas_modelo, label_encoders = load_model()
 
 if model is None:
     st.stop()
 
+umbrales = load_umbrales()
+modelo_dir = '.'
+
 # ============================================
 # SIDEBAR - INPUTS
 # ============================================
@@ -123,24 +162,24 @@ st.sidebar.markdown("---")
 
 # ⭐⭐⭐ SECCIÓN 1: FACTORES CRÍTICOS ⭐⭐⭐
 st.sidebar.markdown("### 🏆 **FACTORES CRÍTICOS**")
-st.sidebar.markdown("*Estos 3 factores determinan el 90% de la decisión de compra*")
+st.sidebar.markdown("*Su peso real en cada predicción aparece en el análisis de factores*")
 
 titulo_lote = st.sidebar.radio(
     "🏆 ¿Lote tiene TÍTULO INDEPENDIZADO?",
-    ['Si', 'No'],
-    help="⚠️ FACTOR MÁS IMPORTANTE (98.6% de impacto en la decisión)"
+    OPCIONES_SIDEBAR['titulo_lote'],
+    help="¿El lote cuenta con título independizado?"
 )
 
 DOCUMENTOS = st.sidebar.radio(
     "📄 Estado de DOCUMENTOS del cliente",
-    ['Completo', 'Incompleto', 'Pendiente'],
-    help="⚠️ 2do factor más importante (66.8% de impacto)"
+    OPCIONES_SIDEBAR['DOCUMENTOS'],
+    help="Estado de la documentación entregada por el cliente"
 )
 
 visito_lote = st.sidebar.radio(
     "👁️ ¿El cliente VISITÓ el lote?",
-    ['Si', 'No'],
-    help="⚠️ 3er factor más importante (38.8% de impacto)"
+    OPCIONES_SIDEBAR['visito_lote'],
+    help="¿El cliente visitó el lote en persona?"
 )
 
 st.sidebar.markdown("---")
@@ -152,20 +191,20 @@ col1, col2 = st.sidebar.columns(2)
 with col1:
     monto_reserva = st.number_input(
         "Monto Reserva ($)",
-        min_value=100,
-        max_value=10000,
+        min_value=RANGOS_SIDEBAR['monto_reserva'][0],
+        max_value=RANGOS_SIDEBAR['monto_reserva'][1],
         value=3000,
-        step=100,
+        step=RANGOS_SIDEBAR['monto_reserva'][2],
         help="Mayor reserva = Mayor compromiso"
     )
 
 with col2:
     lote_precio_total = st.number_input(
         "Precio Lote ($)",
-        min_value=15000,
-        max_value=40000,
+        min_value=RANGOS_SIDEBAR['lote_precio_total'][0],
+        max_value=RANGOS_SIDEBAR['lote_precio_total'][1],
         value=25000,
-        step=1000
+        step=RANGOS_SIDEBAR['lote_precio_total'][2]
     )
 
 # Mostrar ratio automáticamente
@@ -175,15 +214,15 @@ st.sidebar.metric("📊 Ratio Reserva/Precio", f"{ratio_reserva:.1f}%",
 
 SALARIO_DECLARADO = st.sidebar.slider(
     "💵 Salario Declarado ($)",
-    min_value=1000,
-    max_value=5000,
+    min_value=RANGOS_SIDEBAR['SALARIO_DECLARADO'][0],
+    max_value=RANGOS_SIDEBAR['SALARIO_DECLARADO'][1],
     value=2500,
-    step=500
+    step=RANGOS_SIDEBAR['SALARIO_DECLARADO'][2]
 )
 
 metodo_pago = st.sidebar.selectbox(
     "💳 Método de Pago",
-    ['TARJETA', 'YAPE', 'EFECTIVO'],
+    OPCIONES_SIDEBAR['metodo_pago'],
     help="Tarjeta indica mayor formalidad"
 )
 
@@ -194,27 +233,27 @@ st.sidebar.markdown("### 👤 **DATOS DEL CLIENTE**")
 
 cliente_edad = st.sidebar.slider(
     "Edad del Cliente",
-    min_value=20,
-    max_value=70,
+    min_value=RANGOS_SIDEBAR['cliente_edad'][0],
+    max_value=RANGOS_SIDEBAR['cliente_edad'][1],
     value=40,
-    step=1
+    step=RANGOS_SIDEBAR['cliente_edad'][2]
 )
 
 col1, col2 = st.sidebar.columns(2)
 with col1:
-    cliente_genero = st.radio("Género", ['M', 'F'], horizontal=True)
+    cliente_genero = st.radio("Género", OPCIONES_SIDEBAR['cliente_genero'], horizontal=True)
 
 with col2:
-    estado_civil = st.selectbox("Estado Civil", ['Casado', 'Soltero', 'Divorciado', 'Viudo'])
+    estado_civil = st.selectbox("Estado Civil", OPCIONES_SIDEBAR['estado_civil'])
 
 cliente_profesion = st.sidebar.selectbox(
     "Profesión",
-    ['Ingeniero', 'Doctor', 'Empresario', 'Abogado', 'Docente', 'Comerciante', 'Otro']
+    OPCIONES_SIDEBAR['cliente_profesion']
 )
 
 distrito = st.sidebar.selectbox(
     "Distrito",
-    ['Distrito_A', 'Distrito_B', 'Distrito_C', 'Distrito_D', 'Distrito_E']
+    OPCIONES_SIDEBAR['distrito']
 )
 
 st.sidebar.markdown("---")
@@ -223,25 +262,25 @@ st.sidebar.markdown("---")
 with st.sidebar.expander("🏘️ Información del Lote"):
     proyecto = st.selectbox(
         "Proyecto",
-        [f'PROYECTO_{i}' for i in range(1, 11)]
+        OPCIONES_SIDEBAR['proyecto']
     )
     
     manzana = st.selectbox(
         "Manzana",
-        ['Mz-A', 'Mz-B', 'Mz-C', 'Mz-D', 'Mz-E']
+        OPCIONES_SIDEBAR['manzana']
     )
     
     lote_ubicacion = st.selectbox(
         "Ubicación del Lote",
-        [f'UBICACION_{i}' for i in range(1, 11)]
+        OPCIONES_SIDEBAR['lote_ubicacion']
     )
     
     metros_cuadrados = st.slider(
         "Metros Cuadrados",
-        min_value=80,
-        max_value=200,
+        min_value=RANGOS_SIDEBAR['metros_cuadrados'][0],
+        max_value=RANGOS_SIDEBAR['metros_cuadrados'][1],
         value=120,
-        step=5
+        step=RANGOS_SIDEBAR['metros_cuadrados'][2]
     )
     
     st.markdown("**Ubicación y Amenities:**")
@@ -253,29 +292,28 @@ with st.sidebar.expander("🏘️ Información del Lote"):
 with st.sidebar.expander("📢 Información de Marketing"):
     canal_contacto = st.selectbox(
         "Canal de Contacto",
-        ['LLAMADA DIRECTA', 'WHATSAPP DIRECTO', 'EVENTO', 'FACEBOOK', 
-         'PAGINA WEB', 'INSTAGRAM', 'VOLANTES']
+        OPCIONES_SIDEBAR['canal_contacto']
     )
     
     promesa_regalo = st.selectbox(
         "Promesa de Regalo",
-        ['TV', 'Cocina', 'Refrigeradora', 'Lavadora', 'Ninguno']
+        OPCIONES_SIDEBAR['promesa_regalo']
     )
     
     tiempo_reserva_dias = st.number_input(
         "Días desde la Reserva",
-        min_value=1,
-        max_value=730,
+        min_value=RANGOS_SIDEBAR['tiempo_reserva_dias'][0],
+        max_value=RANGOS_SIDEBAR['tiempo_reserva_dias'][1],
         value=30,
-        step=1
+        step=RANGOS_SIDEBAR['tiempo_reserva_dias'][2]
     )
     
     dias_hasta_limite = st.number_input(
         "Días hasta Fecha Límite",
-        min_value=1,
-        max_value=90,
+        min_value=RANGOS_SIDEBAR['dias_hasta_limite'][0],
+        max_value=RANGOS_SIDEBAR['dias_hasta_limite'][1],
         value=30,
-        step=1
+        step=RANGOS_SIDEBAR['dias_hasta_limite'][2]
     )
 
 st.sidebar.markdown("---")
@@ -285,70 +323,50 @@ st.sidebar.markdown("---")
 # ============================================
 def preprocess_input(data):
     try:
-        # Crear DataFrame
-        input_df = pd.DataFrame([data])
-        
-        # Feature Engineering
-        input_df['ratio_reserva_precio'] = input_df['monto_reserva'] / input_df['lote_precio_total']
-        input_df['precio_m2'] = input_df['lote_precio_total'] / input_df['metros_cuadrados']
-        
-        # Codificar edad categorizada
-        edad = input_df['cliente_edad'].iloc[0]
-        input_df['cliente_edad_cat_36-45'] = 1 if 35 < edad <= 45 else 0
-        input_df['cliente_edad_cat_46-55'] = 1 if 45 < edad <= 55 else 0
-        input_df['cliente_edad_cat_56-70'] = 1 if edad > 55 else 0
-        
-        # One-Hot Encoding manual
-        categorical_mappings = {
-            'metodo_pago': ['EFECTIVO', 'TARJETA', 'YAPE'],
-            'cliente_genero': ['M', 'F'],
-            'cliente_profesion': ['Ingeniero', 'Doctor', 'Abogado', 'Docente', 'Comerciante', 'Empresario', 'Otro'],
-            'distrito': ['Distrito_A', 'Distrito_B', 'Distrito_C', 'Distrito_D', 'Distrito_E'],
-            'canal_contacto': ['EVENTO', 'FACEBOOK', 'PAGINA WEB', 'WHATSAPP', 'INSTAGRAM', 'VOLANTES', 'LLAMADA DIRECTA', 'WHATSAPP DIRECTO'],
-            'promesa_regalo': ['Ninguno', 'Cocina', 'Refrigeradora', 'TV', 'Lavadora'],
-            'DOCUMENTOS': ['Completo', 'Incompleto', 'Pendiente'],
-            'CERCA_ESQUINA': ['Si', 'No'],
-            'CERCA_COLEGIO': ['Si', 'No'],
-            'CERCA_PARQUE': ['Si', 'No'],
-            'visito_lote': ['Si', 'No'],
-            'titulo_lote': ['Si', 'No'],
-            'estado_civil': ['Soltero', 'Casado', 'Divorciado', 'Viudo']
-        }
-        
-        for col, values in categorical_mappings.items():
-            for value in values[1:]:
-                col_name = f"{col}_{value}"
-                input_df[col_name] = 1 if data[col] == value else 0
-        
-        # Label Encoding
-        for col in ['proyecto', 'manzana', 'lote_ubicacion']:
-            if label_encoders.get(col) is not None:
-                try:
-                    input_df[f'{col}_encoded'] = label_encoders[col].transform([data[col]])[0]
-                except:
-                    input_df[f'{col}_encoded'] = 0
-        
-        # Asegurar columnas del modelo
-        for col in columnas_modelo:
-            if col not in input_df.columns:
-                input_df[col] = 0
-        
-        input_df = input_df[columnas_modelo]
-        
-        # Escalar variables numéricas
-        numeric_cols = ['metros_cuadrados', 'monto_reserva', 'lote_precio_total',
-                       'tiempo_reserva_dias', 'SALARIO_DECLARADO',
-                       'ratio_reserva_precio', 'dias_hasta_limite', 'precio_m2']
-        
-        numeric_cols = [col for col in numeric_cols if col in input_df.columns]
-        input_df[numeric_cols] = scaler.transform(input_df[numeric_cols])
-        
-        return input_df
+        return preprocess_batch(pd.DataFrame([data]), scaler, columnas_modelo, label_encoders)
         
     except Exception as e:
         st.error(f"Error en preprocesamiento: {e}")
         return None
 
+# Nombre con el que se muestra cada campo del modelo en el análisis de factores
+ETIQUETAS_FACTOR = {
+    'titulo_lote': "🏆 Título del lote",
+    'DOCUMENTOS': "📄 Documentos",
+    'visito_lote': "👁️ Visitó el lote",
+    'monto_reserva': "💰 Monto de reserva",
+    'ratio_reserva_precio': "💰 Ratio reserva/precio",
+    'lote_precio_total': "🏷️ Precio del lote",
+    'SALARIO_DECLARADO': "💵 Salario declarado",
+    'metodo_pago': "💳 Método de pago",
+    'cliente_edad': "👤 Edad",
+    'cliente_genero': "👤 Género",
+    'estado_civil': "👤 Estado civil",
+    'cliente_profesion': "💼 Profesión",
+    'distrito': "📍 Distrito",
+    'proyecto': "🏘️ Proyecto",
+    'manzana': "🏘️ Manzana",
+    'lote_ubicacion': "🏘️ Ubicación del lote",
+    'metros_cuadrados': "📐 Metros cuadrados",
+    'precio_m2': "📐 Precio por m²",
+    'CERCA_ESQUINA': "📍 Cerca de esquina",
+    'CERCA_COLEGIO': "🏫 Cerca de colegio",
+    'CERCA_PARQUE': "🌳 Cerca de parque",
+    'canal_contacto': "📞 Canal de contacto",
+    'promesa_regalo': "🎁 Promesa de regalo",
+    'tiempo_reserva_dias': "⏰ Días desde la reserva",
+    'dias_hasta_limite': "⏳ Días hasta fecha límite",
+}
+
+def describir_factor(campo, data):
+    # Etiqueta del campo con el valor que tiene en este lead (las derivadas se calculan)
+    valores = {
+        **data,
+        'ratio_reserva_precio': f"{data['monto_reserva'] / data['lote_precio_total'] * 100:.1f}%",
+        'precio_m2': f"${data['lote_precio_total'] / data['metros_cuadrados']:,.0f}",
+    }
+    return f"{ETIQUETAS_FACTOR.get(campo, campo)}: {valores.get(campo, '')}"
+
 # ============================================
 # BOTÓN DE PREDICCIÓN
 # ============================================
@@ -371,7 +389,6 @@ if not predict_button:
         st.markdown("""
         <div class="critical-factor">
         <h3>🏆 Factor #1: Título</h3>
-        <p><b>Impacto: 98.6%</b></p>
         <p>Si el lote tiene título independizado, la probabilidad de compra aumenta dramáticamente.</p>
         </div>
         """, unsafe_allow_html=True)
@@ -380,7 +397,6 @@ if not predict_button:
         st.markdown("""
         <div class="critical-factor">
         <h3>📄 Factor #2: Documentos</h3>
-        <p><b>Impacto: 66.8%</b></p>
         <p>Documentación completa es crucial para cerrar la venta.</p>
         </div>
         """, unsafe_allow_html=True)
@@ -389,11 +405,12 @@ if not predict_button:
         st.markdown("""
         <div class="critical-factor">
         <h3>👁️ Factor #3: Visita</h3>
-        <p><b>Impacto: 38.8%</b></p>
         <p>Clientes que visitan el lote tienen mucha mayor probabilidad de compra.</p>
         </div>
         """, unsafe_allow_html=True)
     
+    st.caption("El impacto de cada factor en un lead concreto lo calcula el modelo al presionar el botón")
+    
     st.markdown("---")
     
     # Estadísticas generales
@@ -412,6 +429,41 @@ if not predict_button:
     
     with col4:
         st.metric("Regalo Efectivo", "TV", help="Regalo más efectivo")
+    
+    st.markdown("---")
+    
+    # ============================================
+    # 📦 REPORTE DE LOTE
+    # ============================================
+    st.subheader("📦 Reporte de Lote")
+    st.caption("Sube un CSV con los campos del formulario para obtener un resumen descargable de todos los leads")
+    
+    archivo_lote = st.file_uploader("CSV de leads", type=['csv'])
+    
+    if archivo_lote is not None:
+        try:
+            resumen = build_batch_report(archivo_lote.getvalue(), artifacts_key())
+            
+            st.dataframe(resumen['tiers'], hide_index=True, use_container_width=True)
+            
+            if not resumen['validacion'].empty:
+                with st.expander("⚠️ Problemas de validación del lote"):
+                    st.caption("Los leads con problemas marcados en descarta_lead no se puntuaron; los fuera de rango se puntuaron pero conviene revisarlos")
+                    st.dataframe(resumen['validacion'], hide_index=True, use_container_width=True)
+            
+            for _, alerta in resumen['drift'].iterrows():
+                st.warning(f"📈 Drift en **{alerta['campo']}**: {alerta['metrica']}={alerta['valor']:.3f} (umbral {alerta['umbral']})")
+            
+            formato = st.radio("Formato", ['html', 'csv', 'parquet'], horizontal=True)
+            contenido, mime, extension = export_report(resumen, formato)
+            st.download_button(
+                "⬇️ Descargar reporte",
+                data=contenido,
+                file_name=f"reporte_leads_{datetime.datetime.now().strftime('%Y%m%d')}.{extension}",
+                mime=mime
+            )
+        except Exception as e:
+            st.error(f"❌ Error generando el reporte: {e}")
 
 else:
     # REALIZAR PREDICCIÓN
@@ -448,6 +500,22 @@ else:
         'estado_civil': estado_civil
     }
     
+    # Usar el modelo del proyecto si existe (si no, el global)
+    modelo_dir = load_pool().directory(proyecto)
+    if modelo_dir != '.':
+        model, scaler, columnas_modelo, label_encoders = load_model(proyecto)
+        if model is None:
+            st.stop()
+        umbrales = load_umbrales(modelo_dir)
+    
+    # Validar contra el esquema del modelo antes de preprocesar
+    reporte_validacion = load_schema(proyecto).validate(pd.DataFrame([input_data]))
+    if not reporte_validacion.ok:
+        with st.expander(f"⚠️ Validación de datos: {len(reporte_validacion.problemas)} advertencia(s)"):
+            st.caption("Estos valores no son opciones del formulario, no son categorías conocidas por el modelo o están fuera del rango de entrenamiento")
+            for _, problema in reporte_validacion.problemas.iterrows():
+                st.warning(f"**{problema['campo']}**: {problema['tipo']} ({problema['valor']})")
+    
     # Preprocesar
     processed_data = preprocess_input(input_data)
     
@@ -460,13 +528,13 @@ else:
             # ============================================
             # 🔥 NUEVO: CLASIFICACIÓN HOT/WARM/COLD
             # ============================================
-            if probabilidad >= 0.7:
+            if probabilidad >= umbrales.hot:
                 lead_type = "🔥 HOT LEAD"
                 lead_class = "hot-lead"
                 prioridad = "MÁXIMA"
                 tiempo_respuesta = "24 horas"
                 color_badge = "#ff6b6b"
-            elif probabilidad >= 0.4:
+            elif probabilidad >= umbrales.warm:
                 lead_type = "🟡 WARM LEAD"
                 lead_class = "warm-lead"
                 prioridad = "MEDIA"
@@ -483,14 +551,14 @@ else:
             # 💰 NUEVO: CÁLCULO DE VALOR ESPERADO
             # ============================================
             # Asumiendo 5% de comisión sobre el precio del lote
-            comision_estimada = lote_precio_total * 0.05
-            valor_esperado = probabilidad * comision_estimada
+            comision_estimada = lote_precio_total * COMISION_ESTIMADA
+            valor_esperado = expected_value(probabilidad, lote_precio_total)
             
             # Clasificar por valor
-            if valor_esperado > 1500:
+            if valor_esperado > umbrales.valor_alto:
                 valor_categoria = "💎 ALTO VALOR"
                 valor_color = "success"
-            elif valor_esperado > 800:
+            elif valor_esperado > umbrales.valor_medio:
                 valor_categoria = "💵 VALOR MEDIO"
                 valor_color = "info"
             else:
@@ -556,90 +624,58 @@ else:
             # ============================================
             
             st.markdown("## 🔍 ANÁLISIS DE FACTORES CRÍTICOS")
+            st.caption("Factores a favor y en contra según el modelo para este lead; el impacto es la parte del peso total de la predicción que aporta cada uno")
+            
+            # Contribución de cada campo a la predicción de este lead (log-odds)
+            explainer = load_explainer(proyecto)
+            contribuciones = explainer.explain(processed_data).iloc[0]
+            total_contribucion = contribuciones.abs().sum()
+            impacto = contribuciones.abs() / total_contribucion * 100 if total_contribucion else contribuciones.abs()
             
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("### ✅ FACTORES POSITIVOS")
                 
-                factores_positivos = []
-                
-                # Analizar factores críticos
-                if titulo_lote == 'Si':
-                    factores_positivos.append(("🏆 Lote con TÍTULO INDEPENDIZADO", "98.6%", "success"))
-                
-                if DOCUMENTOS == 'Completo':
-                    factores_positivos.append(("📄 Documentación COMPLETA", "66.8%", "success"))
-                
-                if visito_lote == 'Si':
-                    factores_positivos.append(("👁️ Cliente VISITÓ el lote", "38.8%", "success"))
-                
-                if ratio_reserva >= 10:
-                    factores_positivos.append(("💰 Ratio de reserva ALTO (≥10%)", "65.3%", "success"))
-                
-                if cliente_edad >= 36 and cliente_edad <= 55:
-                    factores_positivos.append(("👤 Edad en rango óptimo (36-55)", "29.4%", "success"))
+                factores_positivos = contribuciones[(contribuciones > 0) & (impacto >= 1)].sort_values(ascending=False)
                 
-                if metodo_pago == 'TARJETA':
-                    factores_positivos.append(("💳 Pago con TARJETA", "22.6%", "success"))
-                
-                if CERCA_ESQUINA:
-                    factores_positivos.append(("📍 Ubicación en ESQUINA", "18.1%", "success"))
-                
-                if SALARIO_DECLARADO >= 3000:
-                    factores_positivos.append(("💵 Salario ALTO (≥$3000)", "11.6%", "success"))
-                
-                if canal_contacto in ['LLAMADA DIRECTA', 'WHATSAPP DIRECTO']:
-                    factores_positivos.append(("📞 Canal de contacto DIRECTO", "9.2%", "success"))
-                
-                if factores_positivos:
-                    for factor, impacto, tipo in factores_positivos:
-                        st.success(f"**{factor}**  \\n*Impacto: {impacto}*")
+                if not factores_positivos.empty:
+                    for campo in factores_positivos.index:
+                        st.success(f"**{describir_factor(campo, input_data)}**  \\n*Impacto: {impacto[campo]:.1f}%*")
                 else:
                     st.info("No se detectaron factores positivos significativos")
             
             with col2:
                 st.markdown("### ❌ FACTORES DE RIESGO")
                 
-                factores_negativos = []
+                factores_negativos = contribuciones[(contribuciones < 0) & (impacto >= 1)].sort_values()
                 
-                # Analizar factores de riesgo
-                if titulo_lote == 'No':
-                    factores_negativos.append(("🏆 Lote SIN título independizado", "98.6%", "error"))
-                
-                if DOCUMENTOS in ['Incompleto', 'Pendiente']:
-                    factores_negativos.append(("📄 Documentación INCOMPLETA", "66.8%", "error"))
-                
-                if visito_lote == 'No':
-                    factores_negativos.append(("👁️ Cliente NO visitó el lote", "38.8%", "error"))
-                
-                if ratio_reserva < 5:
-                    factores_negativos.append(("💰 Ratio de reserva BAJO (<5%)", "65.3%", "error"))
-                
-                if cliente_edad < 30 or cliente_edad > 60:
-                    factores_negativos.append(("👤 Edad fuera de rango óptimo", "29.4%", "warning"))
-                
-                if metodo_pago == 'EFECTIVO':
-                    factores_negativos.append(("💳 Pago en EFECTIVO", "22.6%", "warning"))
-                
-                if tiempo_reserva_dias > 180:
-                    factores_negativos.append(("⏰ Reserva muy antigua (>180 días)", "16.4%", "warning"))
-                
-                if SALARIO_DECLARADO < 2000:
-                    factores_negativos.append(("💵 Salario BAJO (<$2000)", "11.6%", "warning"))
-                
-                if not CERCA_COLEGIO:
-                    factores_negativos.append(("🏫 Lejos de colegios", "9.4%", "warning"))
-                
-                if factores_negativos:
-                    for factor, impacto, tipo in factores_negativos:
-                        if tipo == "error":
-                            st.error(f"**{factor}**  \\n*Impacto negativo: {impacto}*")
+                if not factores_negativos.empty:
+                    for campo in factores_negativos.index:
+                        texto = f"**{describir_factor(campo, input_data)}**  \\n*Impacto negativo: {impacto[campo]:.1f}%*"
+                        if impacto[campo] >= 10:
+                            st.error(texto)
                         else:
-                            st.warning(f"**{factor}**  \\n*Impacto negativo: {impacto}*")
+                            st.warning(texto)
                 else:
                     st.success("✅ No se detectaron factores de riesgo significativos")
             
+            sin_codificacion = load_schema(proyecto).campos_sin_codificacion
+            if sin_codificacion:
+                st.caption("La codificación de estos campos no coincide con la del modelo, así que pueden no influir en la predicción: "
+                           + ", ".join(ETIQUETAS_FACTOR.get(campo, campo) for campo in sin_codificacion))
+            
+            st.markdown("---")
+            
+            # ============================================
+            # 🧠 CONTRIBUCIÓN DEL MODELO POR FACTOR
+            # ============================================
+            
+            st.markdown("## 🧠 CONTRIBUCIÓN DEL MODELO POR FACTOR")
+            st.caption("Aporte de los principales datos de este lead a la predicción del modelo (log-odds)")
+            
+            st.bar_chart(FeatureExplainer.top_factors(contribuciones))
+            
             st.markdown("---")
             
             # ============================================
@@ -648,7 +684,7 @@ else:
             
             st.markdown("## 💡 RECOMENDACIONES PARA EL EQUIPO DE MARKETING")
             
-            if probabilidad >= 0.7:
+            if probabilidad >= umbrales.hot:
                 st.success(f"""
                 ### 🎉 {lead_type} - ACCIÓN INMEDIATA
                 
@@ -664,7 +700,7 @@ else:
                 **Probabilidad de cierre:** MUY ALTA | **Prioridad:** {prioridad}
                 """)
                 
-            elif probabilidad >= 0.4:
+            elif probabilidad >= umbrales.warm:
                 st.warning(f"""
                 ### ⚠️ {lead_type} - ESTRATEGIA DE SEGUIMIENTO
                 
@@ -757,11 +793,11 @@ else:
                 st.markdown("### 📞 Próximos Pasos")
                 st.write(f"**Prioridad:** {prioridad}")
                 st.write(f"**Responder en:** {tiempo_respuesta}")
-                if probabilidad >= 0.7:
+                if probabilidad >= umbrales.hot:
                     st.write("1. ✅ Contactar HOY")
                     st.write("2. ✅ Preparar contrato")
                     st.write("3. ✅ Agendar firma")
-                elif probabilidad >= 0.4:
+                elif probabilidad >= umbrales.warm:
                     st.write("1. 📞 Llamar en 48-72h")
                     st.write("2. 📄 Revisar docs")
                     st.write("3. 👁️ Agendar visita")
@@ -777,27 +813,3 @@ else:
 # Footer
 st.markdown("---")
 st.caption("🎯 Sistema de Predicción de Compras Inmobiliarias | Desarrollado para el Área de Marketing | Precisión: 87.5%")
-'''
-
-# Guardar el archivo
-with open('app.py', 'w', encoding='utf-8') as f:
-    f.write(app_code)
-
-print("✅ Archivo app.py creado exitosamente con las mejoras implementadas!")
-print("\n🔥 NUEVAS FUNCIONALIDADES AGREGADAS:")
-print("\n1. ✅ SISTEMA DE CLASIFICACIÓN HOT/WARM/COLD")
-print("   - 🔥 HOT LEAD (≥70%): Prioridad MÁXIMA, responder en 24h")
-print("   - 🟡 WARM LEAD (40-70%): Prioridad MEDIA, responder en 3-5 días")
-print("   - ❄️ COLD LEAD (<40%): Prioridad BAJA, responder en 7+ días")
-print("\n2. ✅ CÁLCULO DE VALOR ESPERADO DEL LEAD")
-print("   - Fórmula: Probabilidad × Comisión estimada (5% del precio)")
-print("   - Clasificación: 💎 Alto Valor (>$1,500) | 💵 Medio ($800-$1,500) | 💸 Bajo (<$800)")
-print("   - Ayuda a priorizar leads por ROI potencial")
-print("\n3. ✅ MEJORAS VISUALES")
-print("   - Banner colorido según clasificación del lead")
-print("   - Métricas destacadas en la parte superior")
-print("   - Comparación con promedio histórico")
-print("\n📝 Para usar la app:")
-print("   1. Sube este archivo a tu repositorio de GitHub")
-print("   2. Streamlit Cloud lo detectará automáticamente")
-print("   3. ¡Listo para usar por el equipo de marketing!")
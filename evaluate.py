@@ -0,0 +1,160 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, brier_score_loss, roc_auc_score
+
+from scoring import load_artifacts, model_version, score_leads
+from thresholds import load_thresholds
+
+
+# ============================================
+# MÉTRICAS DE CALIDAD
+# ============================================
+def calibration_table(y, probabilidad, n_bins=10):
+    """Tasa real vs probabilidad media por tramo de probabilidad."""
+    tramos = np.minimum((probabilidad * n_bins).astype(int), n_bins - 1)
+    tabla = pd.DataFrame({'tramo': tramos, 'y': y, 'p': probabilidad}).groupby('tramo').agg(
+        n=('y', 'size'), tasa_real=('y', 'mean'), prob_media=('p', 'mean'))
+    return tabla
+
+
+def expected_calibration_error(tabla):
+    return float((tabla['n'] * (tabla['tasa_real'] - tabla['prob_media']).abs()).sum() / tabla['n'].sum())
+
+
+def lift_by_tier(y, tiers):
+    """Conversión y lift de cada tier respecto a la tasa global."""
+    tasa_global = np.mean(y)
+    tabla = pd.DataFrame({'tier': tiers, 'y': y}).groupby('tier')['y'].agg(n='size', conversion='mean')
+    tabla['lift'] = tabla['conversion'] / tasa_global if tasa_global else np.nan
+    return tabla.reindex(['HOT', 'WARM', 'COLD']).dropna(how='all')
+
+
+def quality_metrics(y, probabilidad, tiers, n_bins=10):
+    calibracion = calibration_table(y, probabilidad, n_bins)
+    return {
+        'accuracy': accuracy_score(y, probabilidad >= 0.5),
+        'auc': roc_auc_score(y, probabilidad) if len(np.unique(y)) > 1 else float('nan'),
+        'brier': brier_score_loss(y, probabilidad),
+        'ece': expected_calibration_error(calibracion),
+        'calibracion': calibracion,
+        'lift': lift_by_tier(y, tiers),
+    }
+
+
+# ============================================
+# EVALUACIÓN DE UN CONJUNTO DE ARTEFACTOS
+# ============================================
+def labelled_leads(leads, etiqueta='compro'):
+    """Leads con etiqueta 0/1; descarta filas sin etiqueta antes de puntuar nada."""
+    if etiqueta not in leads.columns:
+        raise ValueError(f"El archivo no tiene la columna de etiqueta '{etiqueta}'")
+    leads = leads.dropna(subset=[etiqueta]).reset_index(drop=True)
+    if leads.empty:
+        raise ValueError(f"Ninguna fila tiene etiqueta en '{etiqueta}'")
+    if not leads[etiqueta].isin([0, 1]).all():
+        raise ValueError(f"La etiqueta '{etiqueta}' debe ser 0/1")
+    return leads
+
+
+def evaluate_artifacts(directorio, leads, etiqueta='compro', batch_size=5000, single_runs=200,
+                       min_batches=5):
+    """Puntúa `leads` con los artefactos de `directorio` midiendo calidad y velocidad.
+
+    El tamaño de lote se reduce si hace falta para tener al menos
+    `min_batches` lotes, de modo que los percentiles de latencia por lote
+    no salgan de una sola medición.
+    """
+    leads = labelled_leads(leads, etiqueta)
+    artefactos = load_artifacts(directorio)
+    umbrales = load_thresholds(directorio)
+    batch_size = max(1, min(batch_size, -(-len(leads) // min_batches)))
+
+    partes, tiempos = [], []
+    for inicio in range(0, len(leads), batch_size):
+        lote = leads.iloc[inicio:inicio + batch_size]
+        t0 = time.perf_counter()
+        partes.append(score_leads(lote, *artefactos))
+        tiempos.append(time.perf_counter() - t0)
+    puntuados = pd.concat(partes, ignore_index=True)
+
+    # Latencia de un lead individual (camino del formulario)
+    individuales = []
+    for i in range(min(single_runs, len(leads))):
+        t0 = time.perf_counter()
+        score_leads(leads.iloc[[i]], *artefactos)
+        individuales.append(time.perf_counter() - t0)
+
+    y = leads[etiqueta].to_numpy().astype(int)
+    probabilidad = puntuados['probabilidad'].to_numpy()
+    resultado = quality_metrics(y, probabilidad, umbrales.tier(probabilidad))
+    resultado.update({
+        'directorio': directorio,
+        'model_version': model_version(directorio),
+        'n_leads': len(leads),
+        'n_lotes': len(tiempos),
+        'batch_size': batch_size,
+        'throughput_leads_s': len(leads) / sum(tiempos),
+        'lote_p50_ms': float(np.percentile(tiempos, 50) * 1000),
+        'lote_p95_ms': float(np.percentile(tiempos, 95) * 1000),
+        'lead_p50_ms': float(np.percentile(individuales, 50) * 1000) if individuales else float('nan'),
+        'lead_p95_ms': float(np.percentile(individuales, 95) * 1000) if individuales else float('nan'),
+    })
+    return resultado
+
+
+ESCALARES = ['model_version', 'n_leads', 'accuracy', 'auc', 'brier', 'ece', 'throughput_leads_s',
+             'n_lotes', 'batch_size', 'lote_p50_ms', 'lote_p95_ms', 'lead_p50_ms', 'lead_p95_ms']
+
+
+def comparison_table(resultados):
+    """Métricas escalares de cada conjunto de artefactos, una columna por conjunto."""
+    return pd.DataFrame({nombre: {k: r[k] for k in ESCALARES} for nombre, r in resultados.items()})
+
+
+def read_leads(ruta):
+    return pd.read_parquet(ruta) if ruta.endswith('.parquet') else pd.read_csv(ruta)
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara el modelo actual con un candidato sobre datos históricos")
+    parser.add_argument('historico', help="CSV o Parquet con los campos del formulario y la etiqueta")
+    parser.add_argument('--actual', default='.', help="Directorio de artefactos en producción")
+    parser.add_argument('--candidato', help="Directorio de artefactos del modelo candidato")
+    parser.add_argument('--etiqueta', default='compro', help="Columna con el resultado real (0/1)")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--min-lotes', type=int, default=5,
+                        help="Mínimo de lotes para los percentiles de latencia por lote")
+    parser.add_argument('--json', help="Guardar las métricas escalares en este archivo")
+    args = parser.parse_args(argv)
+
+    leads = labelled_leads(read_leads(args.historico), args.etiqueta)
+    conjuntos = {'actual': args.actual}
+    if args.candidato:
+        conjuntos['candidato'] = args.candidato
+
+    resultados = {nombre: evaluate_artifacts(directorio, leads, args.etiqueta, args.batch_size,
+                                                    min_batches=args.min_lotes)
+                  for nombre, directorio in conjuntos.items()}
+
+    tabla = comparison_table(resultados)
+    print(tabla.to_string())
+    for nombre, resultado in resultados.items():
+        print(f"\nLift por tier ({nombre}):")
+        print(resultado['lift'].to_string())
+        print(f"\nCalibración ({nombre}):")
+        print(resultado['calibracion'].to_string())
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(tabla.to_dict(), f, indent=2, default=float)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from scoring import CATEGORICAL_MAPPINGS, EDAD_CATEGORIAS, LABEL_ENCODED_COLS
+
+# ============================================
+# AGRUPACIÓN DE COLUMNAS POR CAMPO DE ORIGEN
+# ============================================
+def source_field(columna):
+    """Campo del formulario del que proviene una columna del modelo."""
+    if columna in EDAD_CATEGORIAS:
+        return 'cliente_edad'
+    for col in LABEL_ENCODED_COLS:
+        if columna == f'{col}_encoded':
+            return col
+    # Prefijo más largo primero para no confundir campos con nombres solapados
+    for col in sorted(CATEGORICAL_MAPPINGS, key=len, reverse=True):
+        if columna.startswith(f'{col}_'):
+            return col
+    return columna
+
+
+def _logit(p):
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return np.log(p / (1 - p))
+
+
+class FeatureExplainer:
+    """Contribuciones por campo de origen para cada lead puntuado.
+
+    Para modelos lineales la contribución es exacta (coeficiente × valor
+    escalado, en log-odds) y un lote completo se explica con un único
+    producto de matrices. Para otros modelos se usa oclusión: cada campo se
+    reemplaza por su valor de referencia y se mide el cambio en log-odds,
+    evaluando todas las perturbaciones en una sola llamada a `predict_proba`.
+
+    Todo lo que depende solo del modelo se calcula una vez en el constructor,
+    así que la instancia puede guardarse en caché junto con el modelo.
+    """
+
+    def __init__(self, model, columnas_modelo, referencia=None):
+        self.model = model
+        self.columnas = list(columnas_modelo)
+        self.campos = list(dict.fromkeys(source_field(c) for c in self.columnas))
+
+        # Matriz columnas x campos para sumar las dummies de cada campo
+        indice = {campo: j for j, campo in enumerate(self.campos)}
+        self._agrupacion = np.zeros((len(self.columnas), len(self.campos)))
+        for i, col in enumerate(self.columnas):
+            self._agrupacion[i, indice[source_field(col)]] = 1.0
+
+        coef = getattr(model, 'coef_', None)
+        self.exacto = coef is not None and np.ndim(coef) == 2 and coef.shape[0] == 1
+        if self.exacto:
+            self._pesos = np.asarray(coef[0], dtype=float)
+            self.base_value = float(np.ravel(model.intercept_)[0])
+        else:
+            # Referencia: media de entrenamiento (0 en variables escaladas y dummies base)
+            if referencia is None:
+                referencia = np.zeros(len(self.columnas))
+            self._referencia = np.asarray(referencia, dtype=float)
+            self.base_value = float(_logit(
+                model.predict_proba(self._frame(self._referencia[None, :]))[:, 1])[0])
+
+    def _frame(self, valores):
+        return pd.DataFrame(valores, columns=self.columnas)
+
+    def explain(self, processed, chunk_size=2000):
+        """DataFrame (leads x campos) con la contribución en log-odds de cada campo."""
+        X = np.asarray(processed[self.columnas] if isinstance(processed, pd.DataFrame) else processed,
+                       dtype=float)
+
+        if self.exacto:
+            contribuciones = (X * self._pesos) @ self._agrupacion
+        else:
+            partes = [self._occlusion(X[i:i + chunk_size]) for i in range(0, len(X), chunk_size)]
+            contribuciones = np.vstack(partes) if partes else np.empty((0, len(self.campos)))
+
+        index = processed.index if isinstance(processed, pd.DataFrame) else None
+        return pd.DataFrame(contribuciones, columns=self.campos, index=index)
+
+    def _occlusion(self, X):
+        n, n_campos = len(X), len(self.campos)
+        mascara = self._agrupacion.T.astype(bool)  # campos x columnas
+
+        # Bloque original seguido de una copia por campo con ese campo ocluido
+        perturbado = np.repeat(X[None, :, :], n_campos + 1, axis=0)
+        for j in range(n_campos):
+            perturbado[j + 1][:, mascara[j]] = self._referencia[mascara[j]]
+
+        proba = self.model.predict_proba(self._frame(perturbado.reshape(-1, X.shape[1])))[:, 1]
+        logits = _logit(proba).reshape(n_campos + 1, n)
+        return (logits[0] - logits[1:]).T
+
+    @staticmethod
+    def top_factors(contribuciones, n=8):
+        """Serie con los `n` campos de mayor contribución absoluta de un lead."""
+        orden = contribuciones.abs().sort_values(ascending=False).index[:n]
+        return contribuciones[orden]
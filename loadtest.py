@@ -0,0 +1,233 @@
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from predictor_pool import PredictorPool
+from scoring import OPCIONES_SIDEBAR, RANGOS_SIDEBAR, score_leads
+from thresholds import load_thresholds
+
+
+# ============================================
+# LEADS SINTÉTICOS (mismas opciones que el sidebar de app.py)
+# ============================================
+def synthetic_leads(n, seed=0):
+    """`n` leads aleatorios, reproducibles con `seed`, con valores que el formulario permite."""
+    rng = np.random.default_rng(seed)
+    leads = {campo: rng.choice(opciones, size=n) for campo, opciones in OPCIONES_SIDEBAR.items()}
+    for campo, (minimo, maximo, paso) in RANGOS_SIDEBAR.items():
+        leads[campo] = minimo + paso * rng.integers(0, (maximo - minimo) // paso + 1, size=n)
+    return pd.DataFrame(leads)
+
+
+# ============================================
+# STAND-IN LOCAL DEL SERVICIO / UI
+# ============================================
+class ServicioLocal:
+    """Reproduce lo que hace la app por cada petición, sin Streamlit.
+
+    Valida los leads contra el esquema de su modelo, puntúa y explica los
+    que pueden puntuarse y los clasifica con los umbrales de ese modelo.
+    Cada lead se enruta a su propio proyecto aunque la petición traiga
+    varios, igual que el reporte de lote. Esquema, explicador y umbrales
+    viven en la entrada del pool, igual que en la app.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def handle(self, leads):
+        """Leads puntuables con probabilidad, valor esperado, `modelo_dir` y tier."""
+        reporte = self.pool.validate(leads)
+        puntuados, _ = self.pool.score(leads[reporte.scorable_mask()], explain=True)
+
+        tiers = pd.Series(index=puntuados.index, dtype=object)
+        for directorio, grupo in puntuados.groupby('modelo_dir'):
+            umbrales = self.pool.resource(grupo['proyecto'].iloc[0], 'umbrales',
+                                          lambda bundle: load_thresholds(directorio))
+            tiers[grupo.index] = umbrales.tier(grupo['probabilidad'])
+        return puntuados.assign(tier=tiers)
+
+
+# ============================================
+# WORKERS
+# ============================================
+def _rss_mb():
+    """Memoria residente actual del proceso (MB).
+
+    Se lee de /proc para obtener el valor actual; donde no existe se usa el
+    pico de `getrusage`, que solo crece, y en sistemas sin `resource`
+    (Windows) se devuelve NaN.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _request(config, pool, servicio, peticion):
+    if config['modo'] == 'servicio':
+        servicio.handle(peticion)
+    elif config['modo'] == 'pool':
+        pool.score(peticion)
+    else:
+        score_leads(peticion, *pool.get(None))
+
+
+def _run_worker(worker_id, config, pool=None, servicio=None, barrera=None):
+    """Ejecuta las peticiones de un representante de ventas simulado.
+
+    La primera petición es de calentamiento: carga lo que haga falta y su
+    latencia se devuelve aparte como arranque en frío. Las peticiones
+    medidas empiezan a la vez en todos los workers (barrera) y solo las que
+    terminan bien entran en las latencias.
+    """
+    rss_inicio = _rss_mb()
+    if pool is None:
+        pool = PredictorPool(config['modelo_dir'], max_resident=config['max_resident'])
+    if config['modo'] == 'servicio' and servicio is None:
+        servicio = ServicioLocal(pool)
+
+    tamano = config['batch_size']
+    leads = synthetic_leads((config['peticiones'] + 1) * tamano, seed=config['seed'] + worker_id)
+
+    t0 = time.perf_counter()
+    _request(config, pool, servicio, leads.iloc[:tamano])
+    arranque = time.perf_counter() - t0
+
+    if barrera is not None:
+        barrera.wait()
+
+    latencias, errores = [], 0
+    inicio = time.perf_counter()
+    for i in range(1, config['peticiones'] + 1):
+        peticion = leads.iloc[i * tamano:(i + 1) * tamano]
+        t0 = time.perf_counter()
+        try:
+            _request(config, pool, servicio, peticion)
+        except Exception:
+            errores += 1
+        else:
+            latencias.append(time.perf_counter() - t0)
+        if config['pausa_ms']:
+            time.sleep(config['pausa_ms'] / 1000)
+
+    return {'worker': worker_id, 'latencias': latencias, 'errores': errores, 'arranque': arranque,
+            'medicion': time.perf_counter() - inicio, 'rss_inicio_mb': rss_inicio, 'rss_fin_mb': _rss_mb()}
+
+
+def _percentil_ms(latencias, q):
+    return float(np.percentile(latencias, q)) if len(latencias) else float('nan')
+
+
+def run_load_test(config):
+    """Lanza `config['workers']` workers concurrentes y agrega sus resultados.
+
+    La memoria se reporta por proceso: con hilos es la del único proceso
+    antes y después del nivel (todos los workers la comparten); con
+    procesos es la media de cada réplica al empezar y al terminar.
+    """
+    workers = config['workers']
+    rss_antes = _rss_mb()
+    t0 = time.perf_counter()
+    if config['procesos']:
+        # Cada proceso carga su propio pool, como una réplica independiente
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(workers) as executor:
+            barrera = manager.Barrier(workers)
+            futuros = [executor.submit(_run_worker, i, config, barrera=barrera) for i in range(workers)]
+            resultados = [f.result() for f in futuros]
+        rss_antes = float(np.mean([r['rss_inicio_mb'] for r in resultados]))
+        rss_despues = float(np.mean([r['rss_fin_mb'] for r in resultados]))
+    else:
+        # Los hilos comparten pool y cachés, como las sesiones de un mismo proceso Streamlit
+        pool = PredictorPool(config['modelo_dir'], max_resident=config['max_resident'])
+        servicio = ServicioLocal(pool)
+        barrera = threading.Barrier(workers)
+        with ThreadPoolExecutor(workers) as executor:
+            futuros = [executor.submit(_run_worker, i, config, pool, servicio, barrera)
+                       for i in range(workers)]
+            resultados = [f.result() for f in futuros]
+        rss_despues = _rss_mb()
+    duracion = time.perf_counter() - t0
+
+    latencias = np.concatenate([r['latencias'] for r in resultados]) * 1000
+    arranques = np.array([r['arranque'] for r in resultados]) * 1000
+    # Tras la barrera todos miden a la vez: el tramo medido dura lo que el worker más lento
+    medicion = max(r['medicion'] for r in resultados)
+    peticiones = len(latencias)
+
+    return {
+        'modo': config['modo'],
+        'workers': workers,
+        'procesos': config['procesos'],
+        'peticiones': peticiones,
+        'errores': int(sum(r['errores'] for r in resultados)),
+        'duracion_s': duracion,
+        'peticiones_s': peticiones / medicion,
+        'leads_s': peticiones * config['batch_size'] / medicion,
+        'arranque_max_ms': float(arranques.max()),
+        'p50_ms': _percentil_ms(latencias, 50),
+        'p95_ms': _percentil_ms(latencias, 95),
+        'p99_ms': _percentil_ms(latencias, 99),
+        'max_ms': float(latencias.max()) if peticiones else float('nan'),
+        'rss_proceso_antes_mb': rss_antes,
+        'rss_proceso_despues_mb': rss_despues,
+    }
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga simulando representantes de ventas concurrentes")
+    parser.add_argument('--modo', choices=['core', 'pool', 'servicio'], default='servicio',
+                        help="core: scoring global; pool: ruteo por proyecto; servicio: camino completo de la app")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32, 80],
+                        help="Niveles de concurrencia a probar")
+    parser.add_argument('--peticiones', type=int, default=50, help="Peticiones por worker")
+    parser.add_argument('--batch-size', type=int, default=1, help="Leads por petición")
+    parser.add_argument('--pausa-ms', type=float, default=0, help="Tiempo de espera entre peticiones")
+    parser.add_argument('--procesos', action='store_true', help="Un proceso por worker en lugar de hilos")
+    parser.add_argument('--modelo-dir', default='.')
+    parser.add_argument('--max-resident', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for workers in args.workers:
+        config = {
+            'modo': args.modo,
+            'workers': workers,
+            'peticiones': args.peticiones,
+            'batch_size': args.batch_size,
+            'pausa_ms': args.pausa_ms,
+            'procesos': args.procesos,
+            'modelo_dir': args.modelo_dir,
+            'max_resident': args.max_resident,
+            'seed': args.seed,
+        }
+        resultados.append(run_load_test(config))
+
+    print(pd.DataFrame(resultados).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
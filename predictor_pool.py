@@ -0,0 +1,222 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from dataclasses import asdict
+
+import pandas as pd
+
+from explain import FeatureExplainer
+from scoring import load_artifacts, model_signature, score_leads
+from validation import DriftMonitor, LeadSchema, ValidationReport
+
+# Modelos por proyecto: modelos/<PROYECTO>/ con los mismos .pkl que el global
+MODELOS_DIR = 'modelos'
+
+# Nombres de proyecto que pueden ser un subdirectorio de modelos/ (sin separadores ni '..')
+NOMBRE_PROYECTO = re.compile(r'[A-Za-z0-9_-]+')
+
+
+class PredictorPool:
+    """Modelos por proyecto con carga perezosa y un tope LRU de bundles residentes.
+
+    Un proyecto sin directorio propio en `modelos/` usa el modelo global. El
+    global se carga una vez y no cuenta para el tope; los de proyecto se
+    cargan al primer uso y el menos usado recientemente se descarta cuando
+    se supera `max_resident`, junto con los recursos derivados (explicador,
+    esquema) que se hayan construido para él con `resource`.
+
+    La lectura de disco ocurre fuera del lock: mientras un proyecto se
+    carga, los demás hilos siguen atendiendo modelos ya residentes, y los
+    que piden ese mismo proyecto esperan a la misma carga.
+
+    Cada entrada guarda la firma (`model_signature`) de su mejor_modelo.pkl.
+    Si el archivo cambia en disco (reentrenamiento), la entrada se descarta
+    con sus derivados y se vuelve a cargar en la siguiente petición, sin
+    reiniciar la app.
+    """
+
+    def __init__(self, base_dir='.', modelos_dir=None, max_resident=4):
+        self.base_dir = base_dir
+        self.modelos_dir = modelos_dir if modelos_dir is not None else os.path.join(base_dir, MODELOS_DIR)
+        self.max_resident = max_resident
+        self._global = None
+        self._residentes = OrderedDict()
+        self._cargando = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+
+    def directory(self, proyecto):
+        """Directorio de artefactos que atiende a `proyecto` (el global si no tiene uno propio).
+
+        `proyecto` llega de formularios y CSV subidos: solo se busca en disco
+        si es un nombre simple, para que nunca se cargue (deserialice) un
+        .pkl fuera de `modelos_dir`. Cualquier otro valor usa el global.
+        """
+        if isinstance(proyecto, str) and NOMBRE_PROYECTO.fullmatch(proyecto):
+            propio = os.path.join(self.modelos_dir, str(proyecto))
+            if os.path.exists(os.path.join(propio, 'mejor_modelo.pkl')):
+                return propio
+        return self.base_dir
+
+    def _entry(self, directorio):
+        firma = model_signature(directorio)
+        with self._lock:
+            entrada = self._global if directorio == self.base_dir else self._residentes.get(directorio)
+            if entrada is not None and entrada['firma'] == firma:
+                self.hits += 1
+                if directorio != self.base_dir:
+                    self._residentes.move_to_end(directorio)
+                return entrada
+            if entrada is not None:
+                # El modelo cambió en disco: se descarta la entrada vieja
+                self.reloads += 1
+                if directorio == self.base_dir:
+                    self._global = None
+                else:
+                    del self._residentes[directorio]
+
+            futuro = self._cargando.get(directorio)
+            propietario = futuro is None
+            if propietario:
+                self.misses += 1
+                futuro = self._cargando[directorio] = Future()
+
+        if not propietario:
+            return futuro.result()
+
+        try:
+            entrada = {'artefactos': load_artifacts(directorio), 'derivados': {}, 'firma': firma}
+        except Exception as e:
+            with self._lock:
+                del self._cargando[directorio]
+            futuro.set_exception(e)
+            raise
+
+        with self._lock:
+            if directorio == self.base_dir:
+                self._global = entrada
+            else:
+                self._residentes[directorio] = entrada
+                while len(self._residentes) > self.max_resident:
+                    self._residentes.popitem(last=False)
+                    self.evictions += 1
+            del self._cargando[directorio]
+        futuro.set_result(entrada)
+        return entrada
+
+    def get(self, proyecto=None):
+        """Bundle (model, scaler, columnas, label_encoders) para `proyecto`."""
+        return self._entry(self.directory(proyecto))['artefactos']
+
+    def resource(self, proyecto, nombre, factory):
+        """Objeto derivado del bundle de `proyecto`, construido una vez con `factory(bundle)`.
+
+        Vive dentro de la entrada del pool, así que se descarta cuando el
+        bundle sale del LRU.
+        """
+        entrada = self._entry(self.directory(proyecto))
+        derivados = entrada['derivados']
+        if nombre not in derivados:
+            objeto = factory(entrada['artefactos'])
+            with self._lock:
+                derivados.setdefault(nombre, objeto)
+        return derivados[nombre]
+
+    def explainer(self, proyecto=None):
+        """`FeatureExplainer` del modelo que atiende a `proyecto`, guardado en su entrada."""
+        return self.resource(proyecto, 'explainer', lambda bundle: FeatureExplainer(bundle[0], bundle[2]))
+
+    def schema(self, proyecto=None):
+        """`LeadSchema` del modelo que atiende a `proyecto`, guardado en su entrada."""
+        return self.resource(proyecto, 'schema', lambda bundle: LeadSchema(bundle[1], bundle[2], bundle[3]))
+
+    def directories(self):
+        """Directorio global más los de proyecto que tienen modelo propio en disco."""
+        directorios = [self.base_dir]
+        if os.path.isdir(self.modelos_dir):
+            for proyecto in sorted(os.listdir(self.modelos_dir)):
+                if self.directory(proyecto) != self.base_dir:
+                    directorios.append(self.directory(proyecto))
+        return directorios
+
+    def resident(self):
+        """Directorios de proyecto cargados, del menos al más usado recientemente."""
+        with self._lock:
+            return list(self._residentes)
+
+    def _groups(self, leads):
+        """(directorio, índices, proyecto) de cada modelo que atiende parte de `leads`."""
+        if 'proyecto' not in leads.columns:
+            if len(leads):
+                yield self.base_dir, leads.index, None
+            return
+        proyectos = leads['proyecto'].astype(object)
+        directorios = proyectos.map({p: self.directory(p) for p in proyectos.unique()})
+        for directorio, indices in directorios.groupby(directorios).groups.items():
+            proyecto = None if directorio == self.base_dir else proyectos[indices[0]]
+            yield directorio, indices, proyecto
+
+    def validate(self, leads):
+        """`ValidationReport` del lote: cada lead contra el esquema del modelo que lo puntúa.
+
+        `fila` es la posición del lead en `leads`, igual que en `LeadSchema.validate`.
+        """
+        leads = pd.DataFrame(leads).reset_index(drop=True)
+        problemas = []
+        for directorio, indices, proyecto in self._groups(leads):
+            reporte = self.schema(proyecto).validate(leads.loc[indices])
+            problemas.append(reporte.problemas.assign(fila=indices[reporte.problemas['fila']]))
+        problemas = (pd.concat(problemas, ignore_index=True) if problemas
+                     else pd.DataFrame(columns=['fila', 'campo', 'tipo', 'valor']))
+        return ValidationReport(problemas, len(leads))
+
+    def drift(self, leads):
+        """Alertas de drift del lote frente a la referencia de cada modelo, una fila por alerta."""
+        leads = pd.DataFrame(leads).reset_index(drop=True)
+        alertas = []
+        for directorio, indices, proyecto in self._groups(leads):
+            referencia = self.resource(proyecto, 'referencia_drift', lambda bundle: DriftMonitor.from_scaler(
+                bundle[1], bundle[2], directorio).referencia)
+            for alerta in DriftMonitor(referencia).update(leads.loc[indices]):
+                alertas.append({'modelo_dir': directorio, 'n_leads': len(indices), **asdict(alerta)})
+        return pd.DataFrame(alertas, columns=['modelo_dir', 'n_leads', 'campo', 'metrica', 'valor', 'umbral'])
+
+    def score(self, leads, explain=False):
+        """Puntúa un lote agrupando por proyecto: una llamada vectorizada por modelo.
+
+        Los proyectos que caen en el modelo global se puntúan juntos. El
+        resultado conserva el orden y el índice de `leads` (p. ej. las filas
+        que dejó `validate`) e incluye `modelo_dir`. Con `explain=True`
+        devuelve además las contribuciones por campo, calculadas sobre la
+        misma matriz preprocesada que se puntuó.
+        """
+        leads = pd.DataFrame(leads)
+        if not leads.index.is_unique:
+            leads = leads.reset_index(drop=True)
+
+        partes, contribuciones = [], []
+        for directorio, indices, proyecto in self._groups(leads):
+            grupo = leads.loc[indices]
+            puntuados, processed = score_leads(grupo, *self.get(proyecto), return_processed=True)
+            puntuados.index = indices
+            partes.append(puntuados.assign(modelo_dir=directorio))
+            if explain:
+                contribucion = self.explainer(proyecto).explain(processed)
+                contribucion.index = indices
+                contribuciones.append(contribucion)
+
+        if not partes:
+            vacio = pd.Series(dtype=float, index=leads.index)
+            puntuados = leads.assign(probabilidad=vacio, valor_esperado=vacio, modelo_dir=vacio.astype(object))
+            return (puntuados, pd.DataFrame(index=leads.index)) if explain else puntuados
+
+        puntuados = pd.concat(partes).sort_index()
+        if explain:
+            return puntuados, pd.concat(contribuciones).sort_index()
+        return puntuados
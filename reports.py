@@ -0,0 +1,99 @@
+import datetime
+import io
+
+import numpy as np
+import pandas as pd
+
+TIERS = ['HOT', 'WARM', 'COLD']
+
+# Columnas del lead que se muestran en la tabla de mejores leads
+COLUMNAS_LEAD = ['proyecto', 'manzana', 'lote_ubicacion', 'lote_precio_total', 'monto_reserva',
+                 'canal_contacto', 'DOCUMENTOS', 'titulo_lote', 'visito_lote']
+
+
+# ============================================
+# RESUMEN DEL LOTE
+# ============================================
+def summarize(ranking, contribuciones=None, top_n=20):
+    """Resume un lote puntuado en tres tablas: tiers, mejores leads y factores.
+
+    `ranking` es la salida de `rank_leads` (o de `PredictorPool.score` con
+    tier asignado). `contribuciones` es opcional (leads x campos, mismo
+    índice); de ella se toma el factor de mayor peso de cada lead. Todo se
+    calcula con operaciones por columna, sin recorrer los leads uno a uno.
+    """
+    tiers = ranking.groupby('tier').agg(
+        leads=('probabilidad', 'size'),
+        probabilidad_media=('probabilidad', 'mean'),
+        valor_esperado_total=('valor_esperado', 'sum'),
+    ).reindex(TIERS).fillna(0)
+    tiers['porcentaje'] = tiers['leads'] / max(len(ranking), 1) * 100
+    tiers = tiers.reset_index()
+
+    columnas = [c for c in ['lead_id'] + COLUMNAS_LEAD if c in ranking.columns]
+    mejores = ranking.nlargest(top_n, 'valor_esperado')[
+        columnas + ['probabilidad', 'valor_esperado', 'tier', 'valor_categoria']]
+
+    if contribuciones is not None and len(contribuciones):
+        valores = contribuciones.fillna(0).to_numpy()
+        principal = np.abs(valores).argmax(axis=1)
+        signo = valores[np.arange(len(valores)), principal] >= 0
+        factores = pd.DataFrame({
+            'tier': ranking.loc[contribuciones.index, 'tier'].to_numpy(),
+            'factor': np.asarray(contribuciones.columns)[principal],
+            'efecto': np.where(signo, 'a favor', 'en contra'),
+        }).value_counts().rename('leads').reset_index()
+    else:
+        factores = pd.DataFrame(columns=['tier', 'factor', 'efecto', 'leads'])
+
+    return {'tiers': tiers, 'mejores_leads': mejores.reset_index(drop=True), 'factores': factores}
+
+
+# ============================================
+# EXPORTACIÓN
+# ============================================
+def to_long_table(resumen):
+    """Las tres secciones apiladas en una sola tabla con columna `seccion`."""
+    return pd.concat([tabla.assign(seccion=nombre) for nombre, tabla in resumen.items()],
+                     ignore_index=True)
+
+
+def to_html(resumen, titulo="Resumen de leads"):
+    fecha = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+    secciones = {
+        'tiers': "📊 Leads por clasificación",
+        'mejores_leads': "💎 Mejores leads por valor esperado",
+        'factores': "🔍 Factor principal por clasificación",
+        'validacion': "⚠️ Problemas de validación",
+        'drift': "📈 Alertas de drift frente al entrenamiento",
+    }
+    cuerpo = "".join(
+        f"<h2>{secciones.get(nombre, nombre)}</h2>"
+        + tabla.to_html(index=False, float_format=lambda v: f"{v:,.2f}", border=0)
+        for nombre, tabla in resumen.items()
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{titulo}</title>
+<style>
+    body {{ font-family: sans-serif; margin: 2em; }}
+    table {{ border-collapse: collapse; margin-bottom: 2em; }}
+    th, td {{ padding: 4px 10px; border-bottom: 1px solid #ddd; text-align: right; }}
+    th {{ background-color: #f0f2f6; }}
+</style></head>
+<body><h1>🎯 {titulo}</h1><p>Generado: {fecha}</p>{cuerpo}</body></html>"""
+
+
+def export_report(resumen, formato='html'):
+    """Serializa el resumen en un único archivo; devuelve (bytes, mime, extensión)."""
+    if formato == 'html':
+        return to_html(resumen).encode('utf-8'), 'text/html', 'html'
+    if formato == 'csv':
+        return to_long_table(resumen).to_csv(index=False).encode('utf-8'), 'text/csv', 'csv'
+    if formato == 'parquet':
+        buffer = io.BytesIO()
+        try:
+            to_long_table(resumen).to_parquet(buffer, index=False)
+        except ImportError as e:
+            raise ImportError("Exportar a Parquet requiere pyarrow o fastparquet") from e
+        return buffer.getvalue(), 'application/octet-stream', 'parquet'
+    raise ValueError(f"Formato no soportado: {formato}")
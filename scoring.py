@@ -0,0 +1,189 @@
+import hashlib
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# ============================================
+# CONSTANTES DEL PREPROCESAMIENTO
+# ============================================
+LABEL_ENCODED_COLS = ['proyecto', 'manzana', 'lote_ubicacion']
+
+NUMERIC_COLS = ['metros_cuadrados', 'monto_reserva', 'lote_precio_total',
+                'tiempo_reserva_dias', 'SALARIO_DECLARADO',
+                'ratio_reserva_precio', 'dias_hasta_limite', 'precio_m2']
+
+# One-Hot Encoding manual (el primer valor de cada lista es la categoría base)
+CATEGORICAL_MAPPINGS = {
+    'metodo_pago': ['EFECTIVO', 'TARJETA', 'YAPE'],
+    'cliente_genero': ['M', 'F'],
+    'cliente_profesion': ['Ingeniero', 'Doctor', 'Abogado', 'Docente', 'Comerciante', 'Empresario', 'Otro'],
+    'distrito': ['Distrito_A', 'Distrito_B', 'Distrito_C', 'Distrito_D', 'Distrito_E'],
+    'canal_contacto': ['EVENTO', 'FACEBOOK', 'PAGINA WEB', 'WHATSAPP', 'INSTAGRAM', 'VOLANTES', 'LLAMADA DIRECTA', 'WHATSAPP DIRECTO'],
+    'promesa_regalo': ['Ninguno', 'Cocina', 'Refrigeradora', 'TV', 'Lavadora'],
+    'DOCUMENTOS': ['Completo', 'Incompleto', 'Pendiente'],
+    'CERCA_ESQUINA': ['Si', 'No'],
+    'CERCA_COLEGIO': ['Si', 'No'],
+    'CERCA_PARQUE': ['Si', 'No'],
+    'visito_lote': ['Si', 'No'],
+    'titulo_lote': ['Si', 'No'],
+    'estado_civil': ['Soltero', 'Casado', 'Divorciado', 'Viudo']
+}
+
+# Tramos de edad codificados (columna -> (límite inferior exclusivo, límite superior inclusivo))
+EDAD_CATEGORIAS = {
+    'cliente_edad_cat_36-45': (35, 45),
+    'cliente_edad_cat_46-55': (45, 55),
+    'cliente_edad_cat_56-70': (55, np.inf),
+}
+
+
+# ============================================
+# OPCIONES DEL FORMULARIO
+# ============================================
+# Valores que ofrece cada widget del sidebar de app.py, en el orden en que se muestran
+# (los CERCA_* son checkboxes que la app traduce a 'Si'/'No')
+OPCIONES_SIDEBAR = {
+    'titulo_lote': ['Si', 'No'],
+    'DOCUMENTOS': ['Completo', 'Incompleto', 'Pendiente'],
+    'visito_lote': ['Si', 'No'],
+    'metodo_pago': ['TARJETA', 'YAPE', 'EFECTIVO'],
+    'cliente_genero': ['M', 'F'],
+    'estado_civil': ['Casado', 'Soltero', 'Divorciado', 'Viudo'],
+    'cliente_profesion': ['Ingeniero', 'Doctor', 'Empresario', 'Abogado', 'Docente', 'Comerciante', 'Otro'],
+    'distrito': ['Distrito_A', 'Distrito_B', 'Distrito_C', 'Distrito_D', 'Distrito_E'],
+    'proyecto': [f'PROYECTO_{i}' for i in range(1, 11)],
+    'manzana': ['Mz-A', 'Mz-B', 'Mz-C', 'Mz-D', 'Mz-E'],
+    'lote_ubicacion': [f'UBICACION_{i}' for i in range(1, 11)],
+    'CERCA_ESQUINA': ['Si', 'No'],
+    'CERCA_COLEGIO': ['Si', 'No'],
+    'CERCA_PARQUE': ['Si', 'No'],
+    'canal_contacto': ['LLAMADA DIRECTA', 'WHATSAPP DIRECTO', 'EVENTO', 'FACEBOOK',
+                       'PAGINA WEB', 'INSTAGRAM', 'VOLANTES'],
+    'promesa_regalo': ['TV', 'Cocina', 'Refrigeradora', 'Lavadora', 'Ninguno'],
+}
+
+# (mínimo, máximo, paso) de los widgets numéricos del sidebar
+RANGOS_SIDEBAR = {
+    'monto_reserva': (100, 10000, 100),
+    'lote_precio_total': (15000, 40000, 1000),
+    'SALARIO_DECLARADO': (1000, 5000, 500),
+    'cliente_edad': (20, 70, 1),
+    'metros_cuadrados': (80, 200, 5),
+    'tiempo_reserva_dias': (1, 730, 1),
+    'dias_hasta_limite': (1, 90, 1),
+}
+
+
+# ============================================
+# CARGA DE ARTEFACTOS
+# ============================================
+def load_artifacts(directorio='.'):
+    """Carga modelo, scaler, columnas y label encoders desde `directorio`."""
+    model = joblib.load(os.path.join(directorio, 'mejor_modelo.pkl'))
+    scaler = joblib.load(os.path.join(directorio, 'scaler.pkl'))
+    columnas = joblib.load(os.path.join(directorio, 'columnas_modelo.pkl'))
+
+    label_encoders = {}
+    for col in LABEL_ENCODED_COLS:
+        try:
+            label_encoders[col] = joblib.load(os.path.join(directorio, f'label_encoder_{col}.pkl'))
+        except Exception:
+            label_encoders[col] = None
+
+    return model, scaler, columnas, label_encoders
+
+
+# ============================================
+# PREPROCESAMIENTO VECTORIZADO
+# ============================================
+def preprocess_batch(leads, scaler, columnas_modelo, label_encoders):
+    """Transforma un DataFrame de leads crudos en la matriz que espera el modelo.
+
+    Aplica exactamente las mismas reglas que el formulario de la app, pero
+    columna a columna sobre todo el lote en lugar de fila a fila.
+    """
+    input_df = pd.DataFrame(leads).reset_index(drop=True)
+    nuevas = {}
+
+    # Feature Engineering
+    nuevas['ratio_reserva_precio'] = input_df['monto_reserva'] / input_df['lote_precio_total']
+    nuevas['precio_m2'] = input_df['lote_precio_total'] / input_df['metros_cuadrados']
+
+    # Codificar edad categorizada
+    edad = input_df['cliente_edad']
+    for col, (desde, hasta) in EDAD_CATEGORIAS.items():
+        nuevas[col] = ((edad > desde) & (edad <= hasta)).astype(int)
+
+    # One-Hot Encoding manual
+    for col, values in CATEGORICAL_MAPPINGS.items():
+        for value in values[1:]:
+            nuevas[f"{col}_{value}"] = (input_df[col] == value).astype(int)
+
+    # Label Encoding (categorías desconocidas -> 0)
+    for col in LABEL_ENCODED_COLS:
+        encoder = label_encoders.get(col)
+        if encoder is not None:
+            codigos = {clase: i for i, clase in enumerate(encoder.classes_)}
+            nuevas[f'{col}_encoded'] = input_df[col].map(codigos).fillna(0).astype(int)
+
+    input_df = pd.concat([input_df.drop(columns=list(nuevas), errors='ignore'),
+                          pd.DataFrame(nuevas)], axis=1)
+
+    # Asegurar columnas del modelo
+    input_df = input_df.reindex(columns=columnas_modelo, fill_value=0)
+
+    # Escalar variables numéricas
+    numeric_cols = [col for col in NUMERIC_COLS if col in input_df.columns]
+    input_df[numeric_cols] = scaler.transform(input_df[numeric_cols])
+
+    return input_df
+
+
+def score_batch(model, processed):
+    """Probabilidad de compra para cada fila ya preprocesada."""
+    return model.predict_proba(processed)[:, 1]
+
+
+# ============================================
+# VALOR ESPERADO
+# ============================================
+# Asumiendo 5% de comisión sobre el precio del lote
+COMISION_ESTIMADA = 0.05
+
+
+def expected_value(probabilidad, lote_precio_total):
+    """Probabilidad × comisión estimada sobre el precio del lote."""
+    return probabilidad * (lote_precio_total * COMISION_ESTIMADA)
+
+
+def model_version(directorio='.'):
+    """Identificador corto del modelo: hash del contenido de mejor_modelo.pkl."""
+    digest = hashlib.sha256()
+    with open(os.path.join(directorio, 'mejor_modelo.pkl'), 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            digest.update(bloque)
+    return digest.hexdigest()[:12]
+
+
+def model_signature(directorio='.'):
+    """(mtime, tamaño) de mejor_modelo.pkl: cambia al reentrenar y es barato de consultar en cada petición."""
+    estado = os.stat(os.path.join(directorio, 'mejor_modelo.pkl'))
+    return estado.st_mtime_ns, estado.st_size
+
+
+def score_leads(leads, model, scaler, columnas_modelo, label_encoders, return_processed=False):
+    """Puntúa un lote de leads crudos: probabilidad y valor esperado por fila.
+
+    Con `return_processed=True` devuelve también la matriz preprocesada, para
+    reutilizarla (p. ej. en explicaciones) sin preprocesar dos veces.
+    """
+    leads = pd.DataFrame(leads).reset_index(drop=True)
+    processed = preprocess_batch(leads, scaler, columnas_modelo, label_encoders)
+    probabilidad = score_batch(model, processed)
+    puntuados = leads.assign(
+        probabilidad=probabilidad,
+        valor_esperado=expected_value(probabilidad, leads['lote_precio_total'].to_numpy()),
+    )
+    return (puntuados, processed) if return_processed else puntuados
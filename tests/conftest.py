@@ -0,0 +1,47 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import CATEGORICAL_MAPPINGS, load_artifacts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PKLS = [f for f in os.listdir(ROOT) if f.endswith('.pkl')]
+
+
+@pytest.fixture(scope='session')
+def artefactos():
+    return load_artifacts(ROOT)
+
+
+@pytest.fixture
+def modelo_dir(tmp_path):
+    """Copia de los artefactos reales en un directorio temporal."""
+    for archivo in PKLS:
+        shutil.copy(os.path.join(ROOT, archivo), tmp_path / archivo)
+    return str(tmp_path)
+
+
+def make_leads(n, seed=0):
+    rng = np.random.default_rng(seed)
+    leads = {col: rng.choice(values, size=n) for col, values in CATEGORICAL_MAPPINGS.items()}
+    leads.update(
+        proyecto=rng.choice([f'PROYECTO_{i}' for i in range(1, 11)], size=n),
+        manzana=rng.choice(['Mz-A', 'Mz-B', 'Mz-C', 'Mz-D', 'Mz-E'], size=n),
+        lote_ubicacion=rng.choice([f'UBICACION_{i}' for i in range(1, 11)], size=n),
+        metros_cuadrados=rng.integers(80, 201, size=n),
+        lote_precio_total=rng.integers(15000, 40001, size=n),
+        monto_reserva=rng.integers(100, 10001, size=n),
+        tiempo_reserva_dias=rng.integers(1, 40, size=n),
+        dias_hasta_limite=rng.integers(1, 40, size=n),
+        cliente_edad=rng.integers(20, 71, size=n),
+        SALARIO_DECLARADO=rng.integers(1000, 5001, size=n),
+    )
+    return pd.DataFrame(leads)
+
+
+@pytest.fixture
+def leads():
+    return make_leads(500)
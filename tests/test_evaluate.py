@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluate import (calibration_table, evaluate_artifacts,
+                      expected_calibration_error, labelled_leads, lift_by_tier, main)
+from scoring import score_leads
+
+
+@pytest.fixture
+def historico(artefactos, leads):
+    # Etiquetas muestreadas de la propia probabilidad: modelo informativo y calibrado
+    probabilidad = score_leads(leads, *artefactos)['probabilidad']
+    rng = np.random.default_rng(0)
+    return leads.assign(compro=(rng.uniform(size=len(leads)) < probabilidad).astype(int))
+
+
+def test_evaluate_reports_quality_and_several_batches(modelo_dir, historico):
+    resultado = evaluate_artifacts(modelo_dir, historico, batch_size=5000, single_runs=5)
+
+    assert resultado['n_lotes'] >= 5
+    assert resultado['batch_size'] * resultado['n_lotes'] >= len(historico)
+    assert resultado['auc'] > 0.7
+    assert resultado['ece'] < 0.1
+    assert set(resultado['lift'].index) <= {'HOT', 'WARM', 'COLD'}
+    assert resultado['lift'].loc['HOT', 'lift'] > 1
+
+
+def test_labels_checked_before_scoring(historico):
+    with pytest.raises(ValueError, match='etiqueta'):
+        labelled_leads(historico.drop(columns=['compro']))
+    with pytest.raises(ValueError, match='0/1'):
+        labelled_leads(historico.assign(compro=2))
+
+    con_nulos = historico.astype({'compro': float})
+    con_nulos.loc[:9, 'compro'] = np.nan
+    assert len(labelled_leads(con_nulos)) == len(historico) - 10
+
+
+def test_missing_labels_are_dropped_in_evaluation(modelo_dir, historico):
+    con_nulos = historico.astype({'compro': float})
+    con_nulos.loc[:9, 'compro'] = np.nan
+
+    assert evaluate_artifacts(modelo_dir, con_nulos, single_runs=1)['n_leads'] == len(historico) - 10
+
+
+def test_calibration_and_lift_tables():
+    y = np.array([0, 0, 1, 1])
+    probabilidad = np.array([0.05, 0.05, 0.95, 0.95])
+    tabla = calibration_table(y, probabilidad)
+
+    assert expected_calibration_error(tabla) == pytest.approx(0.05)
+    lift = lift_by_tier(y, np.array(['COLD', 'COLD', 'HOT', 'HOT']))
+    assert lift.loc['HOT', 'lift'] == pytest.approx(2.0)
+    assert 'WARM' not in lift.index
+
+
+def test_cli_compares_current_and_candidate(modelo_dir, historico, tmp_path, capsys):
+    ruta = tmp_path / 'historico.csv'
+    historico.to_csv(ruta, index=False)
+    salida = tmp_path / 'metricas.json'
+
+    main([str(ruta), '--actual', modelo_dir, '--candidato', modelo_dir, '--json', str(salida)])
+
+    assert 'candidato' in capsys.readouterr().out
+    tabla = pd.read_json(salida)
+    assert list(tabla.columns) == ['actual', 'candidato']
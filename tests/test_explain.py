@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from explain import FeatureExplainer, source_field
+from scoring import preprocess_batch
+
+
+def test_source_field_folds_encoded_columns():
+    assert source_field('canal_contacto_WHATSAPP DIRECTO') == 'canal_contacto'
+    assert source_field('promesa_regalo_TV') == 'promesa_regalo'
+    assert source_field('cliente_edad_cat_46-55') == 'cliente_edad'
+    assert source_field('proyecto_encoded') == 'proyecto'
+    assert source_field('precio_m2') == 'precio_m2'
+
+
+def test_linear_contributions_sum_to_logit(artefactos, leads):
+    model, scaler, columnas, label_encoders = artefactos
+    processed = preprocess_batch(leads, scaler, columnas, label_encoders)
+    explainer = FeatureExplainer(model, columnas)
+    contribuciones = explainer.explain(processed)
+
+    assert explainer.exacto
+    assert 'canal_contacto' in contribuciones.columns
+    assert 'canal_contacto_PUBLICIDAD' not in contribuciones.columns
+    np.testing.assert_allclose(contribuciones.sum(axis=1) + explainer.base_value,
+                               model.decision_function(processed), atol=1e-9)
+
+
+class _SoloProba:
+    """Oculta coef_ para forzar el camino aproximado."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+
+def test_occlusion_matches_exact_for_linear_model(artefactos, leads):
+    model, scaler, columnas, label_encoders = artefactos
+    processed = preprocess_batch(leads, scaler, columnas, label_encoders)
+    exacto = FeatureExplainer(model, columnas).explain(processed)
+    aproximado = FeatureExplainer(_SoloProba(model), columnas).explain(processed, chunk_size=64)
+
+    # Fuera de la saturación de la sigmoide la oclusión de un modelo lineal es exacta
+    no_saturados = np.abs(model.decision_function(processed)) < 15
+    assert no_saturados.sum() > 50
+    np.testing.assert_allclose(aproximado.to_numpy()[no_saturados],
+                               exacto.to_numpy()[no_saturados], atol=1e-6)
+
+
+def test_top_factors_orders_by_absolute_value():
+    contribuciones = pd.Series({'a': 0.1, 'b': -2.0, 'c': 1.0})
+
+    assert list(FeatureExplainer.top_factors(contribuciones, n=2).index) == ['b', 'c']
@@ -0,0 +1,122 @@
+import builtins
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+import loadtest
+from loadtest import ServicioLocal, run_load_test, synthetic_leads
+from predictor_pool import PredictorPool
+from scoring import CATEGORICAL_MAPPINGS, OPCIONES_SIDEBAR, RANGOS_SIDEBAR
+
+
+def _config(modelo_dir, **cambios):
+    config = {'modo': 'servicio', 'workers': 3, 'peticiones': 4, 'batch_size': 2, 'pausa_ms': 0,
+              'procesos': False, 'modelo_dir': modelo_dir, 'max_resident': 4, 'seed': 0}
+    config.update(cambios)
+    return config
+
+
+def test_synthetic_leads_stay_within_form_options():
+    leads = synthetic_leads(300, seed=1)
+
+    for campo, opciones in OPCIONES_SIDEBAR.items():
+        assert set(leads[campo]) <= set(opciones)
+    for campo, (minimo, maximo, paso) in RANGOS_SIDEBAR.items():
+        assert leads[campo].between(minimo, maximo).all()
+        assert ((leads[campo] - minimo) % paso == 0).all()
+    assert synthetic_leads(50, seed=7).equals(synthetic_leads(50, seed=7))
+
+
+def test_form_options_are_known_categories():
+    for campo, opciones in OPCIONES_SIDEBAR.items():
+        if campo in CATEGORICAL_MAPPINGS:
+            assert set(opciones) <= set(CATEGORICAL_MAPPINGS[campo]), campo
+
+
+def test_servicio_keeps_resources_in_pool_entry(modelo_dir):
+    pool = PredictorPool(modelo_dir)
+    servicio = ServicioLocal(pool)
+
+    puntuados = servicio.handle(synthetic_leads(3, seed=2))
+
+    assert set(puntuados['tier']) <= {'HOT', 'WARM', 'COLD'}
+    assert pool.resource(None, 'schema', lambda b: None) is not None
+    assert pool.resource(None, 'umbrales', lambda b: None) is not None
+
+
+def test_servicio_routes_each_lead_of_a_batch_to_its_project(modelo_dir):
+    destino = os.path.join(modelo_dir, 'modelos', 'PROYECTO_1')
+    shutil.copytree(modelo_dir, destino, ignore=shutil.ignore_patterns('modelos'))
+    model = joblib.load(os.path.join(destino, 'mejor_modelo.pkl'))
+    model.intercept_ = model.intercept_ + 2
+    joblib.dump(model, os.path.join(destino, 'mejor_modelo.pkl'))
+
+    pool = PredictorPool(modelo_dir)
+    leads = synthetic_leads(40, seed=3)
+    puntuados = ServicioLocal(pool).handle(leads)
+
+    assert (puntuados['modelo_dir'] == puntuados['proyecto'].map(pool.directory)).all()
+    assert {modelo_dir, destino} <= set(puntuados['modelo_dir'])
+    esperado = pool.score(leads.loc[puntuados.index])
+    np.testing.assert_allclose(puntuados['probabilidad'], esperado['probabilidad'])
+
+
+@pytest.mark.parametrize('modo', ['core', 'pool', 'servicio'])
+def test_thread_load_test_counts_only_timed_requests(modelo_dir, modo):
+    resultado = run_load_test(_config(modelo_dir, modo=modo))
+
+    assert resultado['peticiones'] == 3 * 4
+    assert resultado['errores'] == 0
+    assert resultado['arranque_max_ms'] > 0
+    assert resultado['p50_ms'] <= resultado['p95_ms'] <= resultado['max_ms']
+    assert resultado['rss_proceso_despues_mb'] > 0
+
+
+def test_failed_requests_are_kept_out_of_latencies(modelo_dir, monkeypatch):
+    llamadas = []
+
+    def falla_despues_del_calentamiento(self, lead):
+        llamadas.append(len(lead))
+        if len(llamadas) > 1:
+            raise RuntimeError("caída simulada")
+
+    monkeypatch.setattr(ServicioLocal, 'handle', falla_despues_del_calentamiento)
+    resultado = run_load_test(_config(modelo_dir, workers=1))
+
+    assert resultado['errores'] == 4
+    assert resultado['peticiones'] == 0
+    assert np.isnan(resultado['p50_ms'])
+
+
+def test_process_mode_runs_one_replica_per_worker(modelo_dir):
+    resultado = run_load_test(_config(modelo_dir, modo='core', workers=2, peticiones=2, procesos=True))
+
+    assert resultado['peticiones'] == 2 * 2
+    assert resultado['errores'] == 0
+    assert resultado['rss_proceso_despues_mb'] >= resultado['rss_proceso_antes_mb'] > 0
+
+
+def test_rss_is_current_process_memory():
+    assert loadtest._rss_mb() > 0
+
+
+def test_rss_degrades_to_nan_without_proc_or_resource(monkeypatch):
+    real_open, real_import = builtins.open, builtins.__import__
+
+    def sin_proc(ruta, *args, **kwargs):
+        if ruta == '/proc/self/statm':
+            raise FileNotFoundError(ruta)
+        return real_open(ruta, *args, **kwargs)
+
+    def sin_resource(nombre, *args, **kwargs):
+        if nombre == 'resource':
+            raise ImportError(nombre)
+        return real_import(nombre, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', sin_proc)
+    monkeypatch.setattr(builtins, '__import__', sin_resource)
+
+    assert np.isnan(loadtest._rss_mb())
@@ -0,0 +1,202 @@
+import os
+import shutil
+import threading
+import time
+
+import joblib
+import numpy as np
+import pytest
+
+import predictor_pool
+from predictor_pool import PredictorPool
+from scoring import load_artifacts, score_leads
+
+PROYECTOS = ['PROYECTO_1', 'PROYECTO_2', 'PROYECTO_3']
+
+
+@pytest.fixture
+def pool_dir(modelo_dir):
+    """Modelo global más tres modelos de proyecto con intercepto desplazado."""
+    for i, proyecto in enumerate(PROYECTOS, start=1):
+        destino = os.path.join(modelo_dir, 'modelos', proyecto)
+        os.makedirs(destino)
+        for archivo in os.listdir(modelo_dir):
+            if archivo.endswith('.pkl'):
+                shutil.copy(os.path.join(modelo_dir, archivo), destino)
+        model = joblib.load(os.path.join(destino, 'mejor_modelo.pkl'))
+        model.intercept_ = model.intercept_ + i
+        joblib.dump(model, os.path.join(destino, 'mejor_modelo.pkl'))
+    return modelo_dir
+
+
+def test_projects_fall_back_to_global_model(pool_dir):
+    pool = PredictorPool(pool_dir)
+
+    assert pool.directory('PROYECTO_1') == os.path.join(pool_dir, 'modelos', 'PROYECTO_1')
+    assert pool.directory('PROYECTO_9') == pool_dir
+    assert pool.directory(None) == pool_dir
+    assert pool.get('PROYECTO_9') is pool.get(None)
+
+
+def test_score_routes_groups_and_keeps_order(pool_dir, leads):
+    pool = PredictorPool(pool_dir)
+    puntuados = pool.score(leads)
+    globales = score_leads(leads, *load_artifacts(pool_dir))
+
+    propios = leads['proyecto'].isin(PROYECTOS).to_numpy()
+    assert list(puntuados.index) == list(range(len(leads)))
+    assert (puntuados['proyecto'] == leads['proyecto']).all()
+    np.testing.assert_allclose(puntuados['probabilidad'][~propios], globales['probabilidad'][~propios])
+    assert (puntuados['probabilidad'][propios] > globales['probabilidad'][propios]).all()
+    assert set(puntuados.loc[propios, 'modelo_dir']) == {pool.directory(p) for p in PROYECTOS}
+
+
+def test_lru_evicts_least_recently_used(pool_dir):
+    pool = PredictorPool(pool_dir, max_resident=2)
+    pool.get(None)
+    pool.get('PROYECTO_1')
+    pool.get('PROYECTO_2')
+    pool.get('PROYECTO_1')
+    pool.get('PROYECTO_3')
+
+    assert pool.resident() == [pool.directory('PROYECTO_1'), pool.directory('PROYECTO_3')]
+    assert (pool.misses, pool.hits, pool.evictions) == (4, 1, 1)
+
+
+def test_resources_are_evicted_with_their_bundle(pool_dir):
+    pool = PredictorPool(pool_dir, max_resident=1)
+    construidos = []
+
+    def factory(bundle):
+        construidos.append(bundle)
+        return object()
+
+    primero = pool.resource('PROYECTO_1', 'explainer', factory)
+    assert pool.resource('PROYECTO_1', 'explainer', factory) is primero
+    pool.get('PROYECTO_2')
+    assert pool.resource('PROYECTO_1', 'explainer', factory) is not primero
+    assert len(construidos) == 2
+
+
+def test_cold_load_does_not_block_resident_models(pool_dir, monkeypatch):
+    pool = PredictorPool(pool_dir)
+    pool.get(None)
+    liberar = threading.Event()
+    real = predictor_pool.load_artifacts
+
+    def carga_lenta(directorio):
+        liberar.wait(5)
+        return real(directorio)
+
+    monkeypatch.setattr(predictor_pool, 'load_artifacts', carga_lenta)
+    cargando = threading.Thread(target=pool.get, args=('PROYECTO_1',))
+    cargando.start()
+    time.sleep(0.05)
+
+    t0 = time.perf_counter()
+    pool.get(None)
+    assert time.perf_counter() - t0 < 0.5
+    liberar.set()
+    cargando.join()
+
+
+def test_concurrent_requests_share_one_load(pool_dir, monkeypatch):
+    pool = PredictorPool(pool_dir)
+    cargas = []
+    real = predictor_pool.load_artifacts
+
+    def carga_contada(directorio):
+        cargas.append(directorio)
+        time.sleep(0.1)
+        return real(directorio)
+
+    monkeypatch.setattr(predictor_pool, 'load_artifacts', carga_contada)
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(pool.get('PROYECTO_2')))
+             for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(cargas) == 1
+    assert all(r is resultados[0] for r in resultados)
+
+
+def test_failed_load_is_retried(pool_dir, monkeypatch):
+    pool = PredictorPool(pool_dir)
+    real = predictor_pool.load_artifacts
+    monkeypatch.setattr(predictor_pool, 'load_artifacts', lambda d: (_ for _ in ()).throw(OSError('disco')))
+
+    with pytest.raises(OSError):
+        pool.get('PROYECTO_1')
+    monkeypatch.setattr(predictor_pool, 'load_artifacts', real)
+    assert pool.get('PROYECTO_1')[0] is not None
+
+
+def test_directories_lists_global_and_project_models(pool_dir):
+    pool = PredictorPool(pool_dir)
+
+    assert pool.directories() == [pool_dir] + [pool.directory(p) for p in PROYECTOS]
+
+
+@pytest.mark.parametrize('proyecto', ['../PROYECTO_1', 'modelos/../../x', '..', 'PROYECTO_1/', '/tmp', 7, float('nan')])
+def test_project_names_cannot_escape_models_dir(pool_dir, proyecto):
+    # Un directorio con mejor_modelo.pkl fuera de modelos/ nunca se carga
+    fuera = os.path.join(pool_dir, 'PROYECTO_1')
+    shutil.copytree(os.path.join(pool_dir, 'modelos', 'PROYECTO_1'), fuera, dirs_exist_ok=True)
+    pool = PredictorPool(pool_dir)
+
+    assert pool.directory(proyecto) == pool_dir
+
+
+def test_retrained_model_is_reloaded_with_fresh_resources(pool_dir):
+    pool = PredictorPool(pool_dir)
+    antes = pool.get('PROYECTO_1')
+    explainer = pool.explainer('PROYECTO_1')
+    assert pool.get('PROYECTO_1') is antes
+
+    ruta = os.path.join(pool.directory('PROYECTO_1'), 'mejor_modelo.pkl')
+    model = joblib.load(ruta)
+    model.intercept_ = model.intercept_ + 1
+    joblib.dump(model, ruta)
+    os.utime(ruta, ns=(time.time_ns() + 10**9,) * 2)
+
+    despues = pool.get('PROYECTO_1')
+    assert despues is not antes
+    np.testing.assert_allclose(despues[0].intercept_, antes[0].intercept_ + 1)
+    assert pool.explainer('PROYECTO_1') is not explainer
+    assert pool.reloads == 1
+
+
+def test_validate_reports_rows_of_the_whole_batch(pool_dir, leads):
+    pool = PredictorPool(pool_dir)
+    lote = leads.head(40).copy()
+    lote.loc[5, 'monto_reserva'] = np.nan
+    lote.loc[9, 'proyecto'] = 'PROYECTO_99'
+    lote.loc[12, 'DOCUMENTOS'] = 'Extraviado'
+
+    reporte = pool.validate(lote)
+    puntuables = reporte.scorable_mask()
+    puntuados = pool.score(lote[puntuables])
+
+    assert reporte.n_leads == 40
+    assert set(np.flatnonzero(~puntuables)) == {5, 9, 12}
+    assert list(puntuados.index) == list(np.flatnonzero(puntuables))
+    assert puntuados['probabilidad'].notna().all()
+
+
+def test_score_without_scorable_leads_returns_empty_frames(pool_dir, leads):
+    puntuados, contribuciones = PredictorPool(pool_dir).score(leads.head(0), explain=True)
+
+    assert puntuados.empty and 'probabilidad' in puntuados.columns
+    assert contribuciones.empty
+
+
+def test_drift_alerts_name_the_model_directory(pool_dir, leads):
+    pool = PredictorPool(pool_dir)
+    alertas = pool.drift(leads.assign(monto_reserva=leads['monto_reserva'] * 10))
+
+    assert {'modelo_dir', 'campo', 'metrica', 'valor', 'umbral'} <= set(alertas.columns)
+    assert ('monto_reserva', 'desplazamiento_media') in set(zip(alertas['campo'], alertas['metrica']))
+    assert set(alertas['modelo_dir']) <= set(pool.directories())
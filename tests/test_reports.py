@@ -0,0 +1,93 @@
+import io
+
+import pandas as pd
+import pytest
+
+import scoring
+from predictor_pool import PredictorPool
+from reports import export_report, summarize, to_long_table
+from thresholds import TierThresholds, rank_leads
+
+
+@pytest.fixture
+def resumen_y_ranking(modelo_dir, leads):
+    puntuados, contribuciones = PredictorPool(modelo_dir).score(leads, explain=True)
+    ranking = rank_leads(puntuados, TierThresholds())
+    return summarize(ranking, contribuciones, top_n=10), ranking
+
+
+def test_score_with_explain_preprocesses_each_group_once(modelo_dir, leads, monkeypatch):
+    llamadas = []
+    real = scoring.preprocess_batch
+
+    def contada(*args, **kwargs):
+        llamadas.append(len(args[0]))
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(scoring, 'preprocess_batch', contada)
+    puntuados, contribuciones = PredictorPool(modelo_dir).score(leads, explain=True)
+
+    assert llamadas == [len(leads)]
+    assert list(contribuciones.index) == list(puntuados.index)
+
+
+def test_tier_summary_accounts_for_every_lead(resumen_y_ranking):
+    resumen, ranking = resumen_y_ranking
+    tiers = resumen['tiers'].set_index('tier')
+
+    assert list(tiers.index) == ['HOT', 'WARM', 'COLD']
+    assert tiers['leads'].sum() == len(ranking)
+    assert tiers['porcentaje'].sum() == pytest.approx(100)
+    assert tiers['valor_esperado_total'].sum() == pytest.approx(ranking['valor_esperado'].sum())
+
+
+def test_top_leads_are_the_highest_expected_values(resumen_y_ranking):
+    resumen, ranking = resumen_y_ranking
+    mejores = resumen['mejores_leads']
+
+    assert len(mejores) == 10
+    assert list(mejores['valor_esperado']) == sorted(ranking['valor_esperado'], reverse=True)[:10]
+
+
+def test_factor_frequencies_cover_every_lead(resumen_y_ranking):
+    resumen, ranking = resumen_y_ranking
+    factores = resumen['factores']
+
+    assert factores['leads'].sum() == len(ranking)
+    assert set(factores['efecto']) <= {'a favor', 'en contra'}
+    assert factores.groupby('tier')['leads'].sum().to_dict() == ranking['tier'].value_counts().to_dict()
+
+
+def test_summary_without_contributions(resumen_y_ranking):
+    _, ranking = resumen_y_ranking
+    resumen = summarize(ranking)
+
+    assert resumen['factores'].empty
+
+
+def test_export_html_and_csv(resumen_y_ranking):
+    resumen, _ = resumen_y_ranking
+    html, mime, extension = export_report(resumen, 'html')
+
+    assert (mime, extension) == ('text/html', 'html')
+    assert html.decode('utf-8').count('<table') == 3
+
+    contenido, _, extension = export_report(resumen, 'csv')
+    tabla = pd.read_csv(io.BytesIO(contenido))
+    assert extension == 'csv'
+    assert tabla['seccion'].value_counts().to_dict() == to_long_table(resumen)['seccion'].value_counts().to_dict()
+
+
+def test_export_parquet(resumen_y_ranking):
+    pytest.importorskip('pyarrow')
+    resumen, _ = resumen_y_ranking
+    contenido, _, extension = export_report(resumen, 'parquet')
+
+    assert extension == 'parquet'
+    assert len(pd.read_parquet(io.BytesIO(contenido))) == len(to_long_table(resumen))
+
+
+def test_export_rejects_unknown_format(resumen_y_ranking):
+    resumen, _ = resumen_y_ranking
+    with pytest.raises(ValueError):
+        export_report(resumen, 'xlsx')
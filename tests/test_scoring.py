@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from scoring import (COMISION_ESTIMADA, expected_value, model_version, preprocess_batch,
+                     score_batch, score_leads)
+
+
+def test_preprocess_batch_matches_model_columns(artefactos, leads):
+    model, scaler, columnas, label_encoders = artefactos
+    processed = preprocess_batch(leads, scaler, columnas, label_encoders)
+
+    assert list(processed.columns) == list(columnas)
+    assert len(processed) == len(leads)
+    assert not processed.isna().any().any()
+
+
+def test_preprocess_batch_rowwise_equals_batch(artefactos, leads):
+    _, scaler, columnas, label_encoders = artefactos
+    lote = preprocess_batch(leads, scaler, columnas, label_encoders)
+    filas = pd.concat([preprocess_batch(leads.iloc[[i]], scaler, columnas, label_encoders)
+                       for i in range(20)], ignore_index=True)
+
+    np.testing.assert_allclose(filas.to_numpy(float), lote.iloc[:20].to_numpy(float))
+
+
+def test_unknown_label_encoded_category_defaults_to_zero(artefactos, leads):
+    _, scaler, columnas, label_encoders = artefactos
+    processed = preprocess_batch(leads.assign(proyecto='PROYECTO_99'), scaler, columnas, label_encoders)
+
+    assert (processed['proyecto_encoded'] == 0).all()
+
+
+def test_score_leads_adds_probability_and_expected_value(artefactos, leads):
+    puntuados = score_leads(leads, *artefactos)
+    model, scaler, columnas, label_encoders = artefactos
+    esperado = score_batch(model, preprocess_batch(leads, scaler, columnas, label_encoders))
+
+    np.testing.assert_allclose(puntuados['probabilidad'], esperado)
+    np.testing.assert_allclose(puntuados['valor_esperado'],
+                               esperado * leads['lote_precio_total'] * COMISION_ESTIMADA)
+    assert expected_value(0.5, 20000) == 0.5 * 20000 * COMISION_ESTIMADA
+
+
+def test_model_version_is_stable(modelo_dir):
+    assert model_version(modelo_dir) == model_version(modelo_dir)
+    assert len(model_version(modelo_dir)) == 12
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import model_version, score_leads
+from thresholds import (QuantileSketch, TierThresholds, compute_thresholds, load_thresholds,
+                        main, rank_leads, save_thresholds, thresholds_mtime)
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    valores = np.random.default_rng(0).lognormal(size=200_000)
+    sketch = QuantileSketch(relative_accuracy=0.01).update(valores)
+
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exacto = np.quantile(valores, q)
+        assert abs(sketch.quantile(q) - exacto) / exacto < 0.02
+
+
+def test_sketch_merge_equals_single_pass():
+    valores = np.random.default_rng(1).uniform(0, 1, size=50_000)
+    valores[:100] = 0.0
+    completo = QuantileSketch().update(valores)
+    combinado = QuantileSketch().update(valores[:20_000]).merge(QuantileSketch().update(valores[20_000:]))
+
+    assert combinado.count == completo.count == len(valores)
+    assert combinado.zero_count == completo.zero_count == 100
+    for q in (0.001, 0.25, 0.5, 0.95):
+        assert combinado.quantile(q) == completo.quantile(q)
+
+
+def test_sketch_rejects_different_accuracy_and_empty():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.05))
+    with pytest.raises(ValueError):
+        QuantileSketch().quantile(0.5)
+
+
+def test_default_thresholds_keep_previous_cutoffs():
+    umbrales = TierThresholds()
+
+    assert list(umbrales.tier([0.7, 0.69, 0.4, 0.39])) == ['HOT', 'WARM', 'WARM', 'COLD']
+    assert list(umbrales.value_category([1501, 1500, 801, 800])) == ['ALTO', 'MEDIO', 'MEDIO', 'BAJO']
+
+
+def test_compute_thresholds_from_chunks(artefactos, leads):
+    puntuados = score_leads(leads, *artefactos)
+    umbrales = compute_thresholds([puntuados.iloc[:200], puntuados.iloc[200:]], version='v1')
+
+    assert umbrales.n_leads == len(leads)
+    assert umbrales.hot >= umbrales.warm
+    assert umbrales.hot == pytest.approx(np.quantile(puntuados['probabilidad'], 0.8), rel=0.03)
+    assert (umbrales.tier(puntuados['probabilidad']) == 'HOT').mean() == pytest.approx(0.2, abs=0.05)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'hot_quantile': 0.3, 'warm_quantile': 0.6},
+    {'hot_quantile': 0.5, 'warm_quantile': 0.5},
+    {'valor_alto_quantile': 0.2, 'valor_medio_quantile': 0.7},
+])
+def test_compute_thresholds_rejects_inverted_quantiles(kwargs):
+    puntuados = pd.DataFrame({'probabilidad': [0.1, 0.5, 0.9], 'valor_esperado': [10, 50, 90]})
+
+    with pytest.raises(ValueError):
+        compute_thresholds(puntuados, **kwargs)
+
+
+def test_cli_rejects_inverted_quantiles(tmp_path):
+    with pytest.raises(SystemExit):
+        main(['calibrar', str(tmp_path / 'x.csv'), '--hot-quantile', '0.3', '--warm-quantile', '0.6'])
+
+
+def test_thresholds_persist_per_model_version(modelo_dir):
+    version = model_version(modelo_dir)
+    assert load_thresholds(modelo_dir) == TierThresholds(model_version=version)
+    assert thresholds_mtime(modelo_dir) == 0.0
+
+    save_thresholds(TierThresholds(hot=0.9, warm=0.5, model_version=version), modelo_dir)
+    save_thresholds(TierThresholds(hot=0.1, warm=0.05, model_version='otro'), modelo_dir)
+
+    assert load_thresholds(modelo_dir).hot == 0.9
+    assert load_thresholds(modelo_dir, 'otro').hot == 0.1
+    assert thresholds_mtime(modelo_dir) > 0
+
+
+def test_rank_leads_orders_by_expected_value():
+    puntuados = pd.DataFrame({'probabilidad': [0.2, 0.9, 0.5], 'valor_esperado': [100, 2000, 900]})
+    ranking = rank_leads(puntuados, TierThresholds())
+
+    assert list(ranking['valor_esperado']) == [2000, 900, 100]
+    assert list(ranking['tier']) == ['HOT', 'WARM', 'COLD']
+    assert list(ranking['valor_categoria']) == ['ALTO', 'MEDIO', 'BAJO']
+
+
+def test_cli_scores_only_leads_that_pass_validation(modelo_dir, leads, tmp_path, capsys):
+    lote = leads.head(50).copy()
+    lote.loc[3, 'monto_reserva'] = None
+    lote.loc[7, 'proyecto'] = 'PROYECTO_99'
+    lote.to_csv(tmp_path / 'leads.csv', index=False)
+
+    main(['puntuar', str(tmp_path / 'leads.csv'), '--modelo-dir', modelo_dir,
+          '--chunk-size', '20', '-o', str(tmp_path / 'ranking.csv')])
+
+    ranking = pd.read_csv(tmp_path / 'ranking.csv')
+    assert len(ranking) == 48
+    assert 'PROYECTO_99' not in set(ranking['proyecto'])
+    salida = capsys.readouterr().out
+    assert 'no_numerico' in salida and 'categoria_desconocida' in salida
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from scoring import CATEGORICAL_MAPPINGS, preprocess_batch
+from validation import (DriftMonitor, LeadSchema, StreamingStats, population_stability_index,
+                        save_reference, scaler_feature_names)
+
+FORM_LEAD = {
+    'proyecto': 'PROYECTO_1', 'manzana': 'Mz-A', 'lote_ubicacion': 'UBICACION_1',
+    'metros_cuadrados': 120, 'lote_precio_total': 25000, 'monto_reserva': 3000,
+    'tiempo_reserva_dias': 30, 'dias_hasta_limite': 30, 'metodo_pago': 'TARJETA',
+    'cliente_edad': 40, 'cliente_genero': 'M', 'cliente_profesion': 'Ingeniero',
+    'distrito': 'Distrito_A', 'SALARIO_DECLARADO': 2500, 'canal_contacto': 'LLAMADA DIRECTA',
+    'promesa_regalo': 'TV', 'DOCUMENTOS': 'Completo', 'CERCA_ESQUINA': 'No',
+    'CERCA_COLEGIO': 'No', 'CERCA_PARQUE': 'No', 'visito_lote': 'Si', 'titulo_lote': 'Si',
+    'estado_civil': 'Casado',
+}
+
+
+@pytest.fixture(scope='module')
+def schema(artefactos):
+    _, scaler, columnas, label_encoders = artefactos
+    return LeadSchema(scaler, columnas, label_encoders)
+
+
+def _tipos(reporte):
+    return dict(zip(reporte.problemas['campo'], reporte.problemas['tipo']))
+
+
+def test_default_form_lead_is_valid(schema):
+    reporte = schema.validate(pd.DataFrame([FORM_LEAD]))
+
+    assert reporte.ok
+    assert reporte.valid_mask().all()
+
+
+def test_base_categories_are_accepted(schema):
+    # Todas las demás columnas del campo existen: la primera categoría es la base
+    lead = dict(FORM_LEAD, metodo_pago='EFECTIVO', DOCUMENTOS='Completo', distrito='Distrito_A')
+
+    assert schema.validate(pd.DataFrame([lead])).ok
+
+
+def test_form_categories_never_flag_rows(schema, leads):
+    # Solo quedan los números fuera del rango de entrenamiento, que sí dependen del lead
+    reporte = schema.validate(leads)
+
+    assert set(reporte.problemas['tipo']) <= {'fuera_de_rango'}
+    assert not set(reporte.problemas['campo']) & set(schema.campos_sin_codificacion)
+
+
+def test_values_outside_the_form_encode_to_zero(schema):
+    lead = dict(FORM_LEAD, metodo_pago='CHEQUE', visito_lote='Quizas')
+    tipos = _tipos(schema.validate(pd.DataFrame([lead])))
+
+    assert tipos == {'metodo_pago': 'codificacion_en_ceros', 'visito_lote': 'codificacion_en_ceros'}
+
+
+def test_schema_defects_are_listed_once(schema, artefactos):
+    _, _, columnas, _ = artefactos
+
+    # visito_lote_Si está en el modelo pero el formulario genera visito_lote_No
+    assert {'visito_lote', 'titulo_lote', 'cliente_genero', 'estado_civil'} <= set(schema.campos_sin_codificacion)
+    for campo in ['metodo_pago', 'DOCUMENTOS', 'distrito']:
+        assert campo not in schema.campos_sin_codificacion
+        generadas = {f'{campo}_{v}' for v in CATEGORICAL_MAPPINGS[campo][1:]}
+        assert generadas <= set(columnas)
+
+
+def test_unknown_label_and_numeric_problems(schema):
+    lead = dict(FORM_LEAD, proyecto='PROYECTO_99', monto_reserva='x', metros_cuadrados=5000)
+    reporte = schema.validate(pd.DataFrame([lead]).drop(columns=['distrito']))
+    tipos = _tipos(reporte)
+
+    assert tipos['proyecto'] == 'categoria_desconocida'
+    assert tipos['monto_reserva'] == 'no_numerico'
+    assert tipos['metros_cuadrados'] == 'fuera_de_rango'
+    assert tipos['distrito'] == 'campo_faltante'
+    assert not reporte.valid_mask()[0]
+
+
+def test_scaler_without_feature_names_falls_back_to_columns(artefactos, modelo_dir):
+    _, scaler, columnas, _ = artefactos
+    nombres = scaler_feature_names(scaler, columnas)
+    plano = StandardScaler().fit(np.random.default_rng(0).normal(size=(50, len(nombres))))
+
+    assert not hasattr(plano, 'feature_names_in_')
+    assert scaler_feature_names(plano, columnas) == nombres
+
+
+def test_drift_monitor_from_scaler_without_feature_names(modelo_dir, monkeypatch):
+    import validation
+
+    real = validation.load_artifacts
+
+    def sin_nombres(directorio):
+        model, scaler, columnas, encoders = real(directorio)
+        plano = StandardScaler()
+        plano.mean_, plano.scale_ = scaler.mean_, scaler.scale_
+        return model, plano, columnas, encoders
+
+    monkeypatch.setattr(validation, 'load_artifacts', sin_nombres)
+    monitor = DriftMonitor.from_artifacts(modelo_dir)
+
+    assert 'monto_reserva' in monitor.referencia['numericos']
+
+
+def test_streaming_stats_merge_matches_numpy(leads):
+    stats = StreamingStats()
+    for inicio in range(0, len(leads), 77):
+        stats.update(leads.iloc[inicio:inicio + 77])
+
+    for campo in ['monto_reserva', 'cliente_edad']:
+        assert stats.count[campo] == len(leads)
+        assert stats.mean[campo] == pytest.approx(leads[campo].mean())
+        assert stats.variance(campo) == pytest.approx(np.var(leads[campo]))
+    precio_m2 = leads['lote_precio_total'] / leads['metros_cuadrados']
+    assert stats.variance('precio_m2') == pytest.approx(np.var(precio_m2))
+    assert sum(stats.frecuencias['DOCUMENTOS'].values()) == len(leads)
+
+
+def test_drift_alerts_on_shifted_batch(leads, modelo_dir):
+    referencia = StreamingStats().update(leads)
+    save_reference(referencia, modelo_dir)
+
+    estable = DriftMonitor.from_artifacts(modelo_dir)
+    estable.referencia['numericos'] = referencia.to_reference()['numericos']
+    assert estable.update(leads) == []
+
+    desplazado = DriftMonitor.from_artifacts(modelo_dir)
+    desplazado.referencia['numericos'] = referencia.to_reference()['numericos']
+    alertas = desplazado.update(leads.assign(monto_reserva=leads['monto_reserva'] * 3,
+                                             DOCUMENTOS='Pendiente'))
+    campos = {(a.campo, a.metrica) for a in alertas}
+    assert ('monto_reserva', 'desplazamiento_media') in campos
+    assert ('DOCUMENTOS', 'psi') in campos
+
+
+def test_population_stability_index():
+    assert population_stability_index({'a': 0.5, 'b': 0.5}, {'a': 0.5, 'b': 0.5}) == pytest.approx(0)
+    assert population_stability_index({'a': 0.5, 'b': 0.5}, {'a': 0.9, 'b': 0.1}) > 0.2
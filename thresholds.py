@@ -0,0 +1,250 @@
+import argparse
+import json
+import math
+import os
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from scoring import load_artifacts, model_version, score_leads
+from validation import DriftMonitor, LeadSchema
+
+UMBRALES_FILE = 'umbrales_modelo.json'
+
+
+# ============================================
+# SKETCH DE CUANTILES EN STREAMING
+# ============================================
+class QuantileSketch:
+    """Sketch de cuantiles con error relativo acotado para valores no negativos.
+
+    Cada valor cae en un bucket logarítmico de ancho `gamma`, así que la
+    memoria depende del rango de los datos y no de cuántos se observen:
+    millones de leads se resumen en unos cientos de contadores sin ordenar
+    nada. Los sketches de distintos lotes se combinan con `merge`.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def update(self, valores):
+        valores = np.asarray(valores, dtype=float).ravel()
+        valores = valores[~np.isnan(valores)]
+        positivos = valores[valores > self.min_value]
+
+        self.zero_count += len(valores) - len(positivos)
+        self.count += len(valores)
+
+        claves, conteos = np.unique(np.ceil(np.log(positivos) / self._log_gamma).astype(int),
+                                    return_counts=True)
+        for clave, conteo in zip(claves.tolist(), conteos.tolist()):
+            self.bins[clave] = self.bins.get(clave, 0) + conteo
+        return self
+
+    def merge(self, otro):
+        if otro.gamma != self.gamma:
+            raise ValueError("Solo se pueden combinar sketches con la misma precisión")
+        for clave, conteo in otro.bins.items():
+            self.bins[clave] = self.bins.get(clave, 0) + conteo
+        self.zero_count += otro.zero_count
+        self.count += otro.count
+        return self
+
+    def quantile(self, q):
+        if self.count == 0:
+            raise ValueError("El sketch está vacío")
+        rango = q * (self.count - 1)
+        if rango < self.zero_count:
+            return 0.0
+        acumulado = self.zero_count
+        for clave in sorted(self.bins):
+            acumulado += self.bins[clave]
+            if acumulado > rango:
+                return 2 * self.gamma ** clave / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+
+# ============================================
+# UMBRALES DE CLASIFICACIÓN
+# ============================================
+@dataclass
+class TierThresholds:
+    """Cortes HOT/WARM/COLD sobre la probabilidad y ALTO/MEDIO/BAJO sobre el valor esperado."""
+    hot: float = 0.7
+    warm: float = 0.4
+    valor_alto: float = 1500.0
+    valor_medio: float = 800.0
+    model_version: str = ''
+    metodo: str = 'fijo'
+    n_leads: int = 0
+
+    def tier(self, probabilidad):
+        probabilidad = np.asarray(probabilidad, dtype=float)
+        return np.where(probabilidad >= self.hot, 'HOT',
+                        np.where(probabilidad >= self.warm, 'WARM', 'COLD'))
+
+    def value_category(self, valor_esperado):
+        valor_esperado = np.asarray(valor_esperado, dtype=float)
+        return np.where(valor_esperado > self.valor_alto, 'ALTO',
+                        np.where(valor_esperado > self.valor_medio, 'MEDIO', 'BAJO'))
+
+
+def compute_thresholds(puntuados, version='',
+                       hot_quantile=0.8, warm_quantile=0.5,
+                       valor_alto_quantile=0.8, valor_medio_quantile=0.5,
+                       relative_accuracy=0.01):
+    """Calcula los cortes a partir de la distribución de un lote puntuado.
+
+    `puntuados` es un DataFrame con `probabilidad` y `valor_esperado`, o un
+    iterable de ellos, de modo que un lote que no cabe en memoria puede
+    pasarse por partes.
+    """
+    if not 0 <= warm_quantile < hot_quantile <= 1:
+        raise ValueError(f"Se requiere 0 <= warm_quantile < hot_quantile <= 1 "
+                         f"(recibido hot={hot_quantile}, warm={warm_quantile})")
+    if not 0 <= valor_medio_quantile < valor_alto_quantile <= 1:
+        raise ValueError(f"Se requiere 0 <= valor_medio_quantile < valor_alto_quantile <= 1 "
+                         f"(recibido alto={valor_alto_quantile}, medio={valor_medio_quantile})")
+
+    if isinstance(puntuados, pd.DataFrame):
+        puntuados = [puntuados]
+
+    sketch_prob = QuantileSketch(relative_accuracy)
+    sketch_valor = QuantileSketch(relative_accuracy)
+    for chunk in puntuados:
+        sketch_prob.update(chunk['probabilidad'])
+        sketch_valor.update(chunk['valor_esperado'])
+
+    return TierThresholds(
+        hot=min(sketch_prob.quantile(hot_quantile), 1.0),
+        warm=min(sketch_prob.quantile(warm_quantile), 1.0),
+        valor_alto=sketch_valor.quantile(valor_alto_quantile),
+        valor_medio=sketch_valor.quantile(valor_medio_quantile),
+        model_version=version,
+        metodo=f'cuantiles {hot_quantile}/{warm_quantile}',
+        n_leads=sketch_prob.count,
+    )
+
+
+# ============================================
+# PERSISTENCIA JUNTO A LA VERSIÓN DEL MODELO
+# ============================================
+def save_thresholds(umbrales, directorio='.'):
+    """Guarda los umbrales bajo la versión de modelo con la que se calcularon."""
+    ruta = os.path.join(directorio, UMBRALES_FILE)
+    guardados = {}
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            guardados = json.load(f)
+    guardados[umbrales.model_version] = asdict(umbrales)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(guardados, f, indent=2, ensure_ascii=False)
+    return ruta
+
+
+def thresholds_mtime(directorio='.'):
+    """Fecha de modificación del archivo de umbrales (0 si no existe), útil como clave de caché."""
+    ruta = os.path.join(directorio, UMBRALES_FILE)
+    return os.path.getmtime(ruta) if os.path.exists(ruta) else 0.0
+
+
+def load_thresholds(directorio='.', version=None):
+    """Umbrales calibrados para la versión actual del modelo, o los fijos por defecto."""
+    if version is None:
+        version = model_version(directorio)
+    ruta = os.path.join(directorio, UMBRALES_FILE)
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            guardados = json.load(f)
+        if version in guardados:
+            return TierThresholds(**guardados[version])
+    return TierThresholds(model_version=version)
+
+
+def rank_leads(puntuados, umbrales):
+    """Añade tier y categoría de valor, y ordena por valor esperado descendente."""
+    ranking = puntuados.copy()
+    ranking['tier'] = umbrales.tier(ranking['probabilidad'])
+    ranking['valor_categoria'] = umbrales.value_category(ranking['valor_esperado'])
+    return ranking.sort_values('valor_esperado', ascending=False, kind='stable')
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibra umbrales HOT/WARM/COLD y puntúa lotes de leads")
+    parser.add_argument('accion', choices=['calibrar', 'puntuar'])
+    parser.add_argument('leads', help="CSV con los campos del formulario")
+    parser.add_argument('--modelo-dir', default='.', help="Directorio con los .pkl del modelo")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--hot-quantile', type=float, default=0.8)
+    parser.add_argument('--warm-quantile', type=float, default=0.5)
+    parser.add_argument('--valor-alto-quantile', type=float, default=0.8)
+    parser.add_argument('--valor-medio-quantile', type=float, default=0.5)
+    parser.add_argument('-o', '--output', help="CSV de salida para 'puntuar'")
+    args = parser.parse_args(argv)
+
+    if not args.warm_quantile < args.hot_quantile:
+        parser.error("--hot-quantile debe ser mayor que --warm-quantile")
+    if not args.valor_medio_quantile < args.valor_alto_quantile:
+        parser.error("--valor-alto-quantile debe ser mayor que --valor-medio-quantile")
+
+    artefactos = load_artifacts(args.modelo_dir)
+    version = model_version(args.modelo_dir)
+    schema = LeadSchema(*artefactos[1:])
+    monitor = DriftMonitor.from_scaler(artefactos[1], artefactos[2], args.modelo_dir)
+    validaciones = []
+
+    def puntuables(lotes):
+        # Valida cada lote y deja fuera los leads que no pueden puntuarse bien
+        for lote in lotes:
+            reporte = schema.validate(lote)
+            monitor.update(lote)
+            validaciones.append(reporte.summary())
+            validos = lote[reporte.scorable_mask()]
+            if len(validos):
+                yield score_leads(validos, *artefactos)
+
+    lotes = puntuables(pd.read_csv(args.leads, chunksize=args.chunk_size))
+
+    if args.accion == 'calibrar':
+        umbrales = compute_thresholds(
+            lotes,
+            version=version,
+            hot_quantile=args.hot_quantile,
+            warm_quantile=args.warm_quantile,
+            valor_alto_quantile=args.valor_alto_quantile,
+            valor_medio_quantile=args.valor_medio_quantile,
+        )
+        ruta = save_thresholds(umbrales, args.modelo_dir)
+        print(f"Umbrales para modelo {version} guardados en {ruta}:")
+        print(json.dumps(asdict(umbrales), indent=2, ensure_ascii=False))
+    else:
+        umbrales = load_thresholds(args.modelo_dir, version)
+        puntuados = list(lotes)
+        if not puntuados:
+            parser.error("Ningún lead del archivo puede puntuarse; revisa el CSV con validation.py")
+        ranking = rank_leads(pd.concat(puntuados), umbrales)
+        if args.output:
+            ranking.to_csv(args.output, index=False)
+        print(ranking['tier'].value_counts().to_string())
+
+    if validaciones:
+        resumen = pd.concat(validaciones).groupby(['campo', 'tipo', 'descarta_lead'])['n'].sum()
+        if not resumen.empty:
+            print("\nProblemas de validación (descarta_lead=True: no se puntuaron):")
+            print(resumen.to_string())
+    for alerta in monitor.check():
+        print(alerta)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+import argparse
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from explain import source_field
+from scoring import CATEGORICAL_MAPPINGS, LABEL_ENCODED_COLS, load_artifacts
+
+REFERENCIA_FILE = 'referencia_drift.json'
+
+# Campos numéricos del formulario (las variables derivadas se calculan a partir de ellos)
+RAW_NUMERIC_COLS = ['metros_cuadrados', 'monto_reserva', 'lote_precio_total',
+                    'tiempo_reserva_dias', 'SALARIO_DECLARADO', 'dias_hasta_limite',
+                    'cliente_edad']
+DERIVED_NUMERIC_COLS = ['ratio_reserva_precio', 'precio_m2']
+
+# Problemas con los que el lead se puntúa igual y solo se señala; el resto impide puntuarlo bien
+TIPOS_ADVERTENCIA = ['fuera_de_rango']
+
+
+def scaler_feature_names(scaler, columnas_modelo):
+    """Columnas que escala el scaler, aunque se haya ajustado sobre un array sin nombres."""
+    nombres = getattr(scaler, 'feature_names_in_', None)
+    if nombres is None:
+        nombres = [c for c in columnas_modelo if c in RAW_NUMERIC_COLS + DERIVED_NUMERIC_COLS]
+    return list(nombres)
+
+
+def _derived(leads):
+    """Variables derivadas que el scaler espera además de los campos crudos."""
+    return {
+        'ratio_reserva_precio': leads['monto_reserva'] / leads['lote_precio_total'],
+        'precio_m2': leads['lote_precio_total'] / leads['metros_cuadrados'],
+    }
+
+
+# ============================================
+# ESQUEMA Y VALIDACIÓN
+# ============================================
+class LeadSchema:
+    """Esquema de un lead crudo derivado de los artefactos del modelo.
+
+    Un campo one-hot está bien codificado cuando las columnas que genera
+    `preprocess_batch` (una por categoría salvo la primera) son exactamente
+    las del modelo para ese campo; entonces la primera categoría es la base
+    y todas las del formulario son válidas. Si no coinciden, el defecto es
+    del esquema y no de cada lead: el campo se lista una sola vez en
+    `campos_sin_codificacion` y sus categorías del formulario no generan
+    problemas por fila.
+
+    Por fila se reportan campos faltantes, categorías fuera del formulario
+    (`codificacion_en_ceros`, porque el preprocesamiento las deja en 0) o
+    del label encoder (`categoria_desconocida`), valores no numéricos y
+    valores a más de `max_z` desviaciones de la media de entrenamiento.
+    """
+
+    def __init__(self, scaler, columnas_modelo, label_encoders, max_z=4.0):
+        self.max_z = max_z
+        self.codificadas = {}
+        self.campos_sin_codificacion = []
+        for col, values in CATEGORICAL_MAPPINGS.items():
+            # preprocess_batch solo crea columnas para values[1:]; values[0] queda en ceros
+            generadas = {f'{col}_{v}' for v in values[1:]}
+            del_modelo = {c for c in columnas_modelo if source_field(c) == col}
+            if generadas != del_modelo:
+                self.campos_sin_codificacion.append(col)
+            self.codificadas[col] = set(values)
+
+        self.categorias = {}
+        for col in LABEL_ENCODED_COLS:
+            if label_encoders.get(col) is not None:
+                self.categorias[col] = set(label_encoders[col].classes_)
+
+        nombres = scaler_feature_names(scaler, columnas_modelo)
+        self.medias = dict(zip(nombres, scaler.mean_))
+        self.desvios = dict(zip(nombres, scaler.scale_))
+
+    @classmethod
+    def from_artifacts(cls, directorio='.', max_z=4.0):
+        _, scaler, columnas, label_encoders = load_artifacts(directorio)
+        return cls(scaler, columnas, label_encoders, max_z)
+
+    def validate(self, leads):
+        """Revisa un lote completo columna a columna y devuelve un `ValidationReport`."""
+        leads = pd.DataFrame(leads).reset_index(drop=True)
+        problemas = []
+
+        esperados = list(self.codificadas) + list(self.categorias) + RAW_NUMERIC_COLS
+        faltantes = [c for c in esperados if c not in leads.columns]
+        for campo in faltantes:
+            problemas.append(pd.DataFrame({'fila': leads.index, 'campo': campo,
+                                           'tipo': 'campo_faltante', 'valor': None}))
+
+        for campo, validas in self.codificadas.items():
+            if campo in faltantes:
+                continue
+            malos = ~leads[campo].isin(validas)
+            problemas.append(_issues(leads, malos, campo, 'codificacion_en_ceros'))
+
+        for campo, validas in self.categorias.items():
+            if campo in faltantes:
+                continue
+            malos = ~leads[campo].isin(validas)
+            problemas.append(_issues(leads, malos, campo, 'categoria_desconocida'))
+
+        numericos = {}
+        for campo in RAW_NUMERIC_COLS:
+            if campo in faltantes:
+                continue
+            numericos[campo] = pd.to_numeric(leads[campo], errors='coerce')
+            problemas.append(_issues(leads, numericos[campo].isna(), campo, 'no_numerico'))
+
+        if not {'monto_reserva', 'lote_precio_total', 'metros_cuadrados'} & set(faltantes):
+            numericos.update(_derived(numericos))
+        for campo, valores in numericos.items():
+            if campo not in self.medias:
+                continue
+            z = (valores - self.medias[campo]) / self.desvios[campo]
+            problemas.append(_issues(leads, z.abs() > self.max_z, campo, 'fuera_de_rango', valores))
+
+        return ValidationReport(pd.concat(problemas, ignore_index=True), len(leads))
+
+
+def _issues(leads, mascara, campo, tipo, valores=None):
+    mascara = np.asarray(mascara, dtype=bool)
+    fuente = leads[campo] if valores is None else valores
+    return pd.DataFrame({
+        'fila': leads.index[mascara],
+        'campo': campo,
+        'tipo': tipo,
+        'valor': fuente[mascara].to_numpy(),
+    })
+
+
+@dataclass
+class ValidationReport:
+    """Problemas encontrados (una fila por fila/campo) sobre un lote de `n_leads`."""
+    problemas: pd.DataFrame
+    n_leads: int
+
+    @property
+    def ok(self):
+        return self.problemas.empty
+
+    def valid_mask(self):
+        """Máscara booleana de los leads sin ningún problema."""
+        mascara = np.ones(self.n_leads, dtype=bool)
+        mascara[self.problemas['fila'].to_numpy(dtype=int)] = False
+        return mascara
+
+    def scorable_mask(self):
+        """Máscara de los leads que pueden puntuarse: solo tienen problemas de `TIPOS_ADVERTENCIA`."""
+        mascara = np.ones(self.n_leads, dtype=bool)
+        bloqueantes = self.problemas.loc[~self.problemas['tipo'].isin(TIPOS_ADVERTENCIA), 'fila']
+        mascara[bloqueantes.to_numpy(dtype=int)] = False
+        return mascara
+
+    def summary(self):
+        """Conteo de problemas por campo y tipo, indicando si descartan el lead."""
+        resumen = self.problemas.groupby(['campo', 'tipo']).size().rename('n').reset_index()
+        resumen['descarta_lead'] = ~resumen['tipo'].isin(TIPOS_ADVERTENCIA)
+        return resumen
+
+
+# ============================================
+# ESTADÍSTICAS EN STREAMING
+# ============================================
+class StreamingStats:
+    """Media/varianza acumuladas y frecuencias de categorías, actualizables por lotes.
+
+    Cada lote se resume con operaciones vectorizadas y se combina con el
+    acumulado (Chan et al.), así que el coste es lineal en el lote y la
+    memoria no depende de cuántos leads se hayan visto.
+    """
+
+    def __init__(self, numericos=None, categoricos=None):
+        self.numericos = list(numericos if numericos is not None
+                              else RAW_NUMERIC_COLS + DERIVED_NUMERIC_COLS)
+        self.categoricos = list(categoricos if categoricos is not None
+                                else list(CATEGORICAL_MAPPINGS) + LABEL_ENCODED_COLS)
+        self.count = {c: 0 for c in self.numericos}
+        self.mean = {c: 0.0 for c in self.numericos}
+        self.m2 = {c: 0.0 for c in self.numericos}
+        self.frecuencias = {c: {} for c in self.categoricos}
+
+    def update(self, leads):
+        leads = pd.DataFrame(leads)
+        columnas = {c: leads[c] for c in self.numericos if c in leads.columns}
+        if {'monto_reserva', 'lote_precio_total', 'metros_cuadrados'} <= set(leads.columns):
+            columnas.update({k: v for k, v in _derived(leads).items() if k in self.numericos})
+
+        for campo, valores in columnas.items():
+            valores = pd.to_numeric(valores, errors='coerce').dropna().to_numpy(dtype=float)
+            n_b = len(valores)
+            if n_b == 0:
+                continue
+            mean_b = valores.mean()
+            m2_b = ((valores - mean_b) ** 2).sum()
+            n_a, mean_a = self.count[campo], self.mean[campo]
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            self.mean[campo] = mean_a + delta * n_b / n
+            self.m2[campo] += m2_b + delta ** 2 * n_a * n_b / n
+            self.count[campo] = n
+
+        for campo in self.categoricos:
+            if campo not in leads.columns:
+                continue
+            frecuencias = self.frecuencias[campo]
+            for valor, n in leads[campo].astype(str).value_counts().items():
+                frecuencias[valor] = frecuencias.get(valor, 0) + int(n)
+        return self
+
+    def variance(self, campo):
+        return self.m2[campo] / self.count[campo] if self.count[campo] else float('nan')
+
+    def proportions(self, campo):
+        total = sum(self.frecuencias[campo].values())
+        return {k: v / total for k, v in self.frecuencias[campo].items()} if total else {}
+
+    def to_reference(self):
+        """Resumen serializable para usar como referencia de drift."""
+        return {
+            'numericos': {c: {'mean': self.mean[c], 'std': float(np.sqrt(self.variance(c)))}
+                          for c in self.numericos if self.count[c]},
+            'categoricos': {c: self.proportions(c) for c in self.categoricos if self.frecuencias[c]},
+        }
+
+
+# ============================================
+# MONITOR DE DRIFT
+# ============================================
+@dataclass
+class DriftAlert:
+    campo: str
+    metrica: str
+    valor: float
+    umbral: float
+
+    def __str__(self):
+        return f"⚠️ {self.campo}: {self.metrica}={self.valor:.3f} (umbral {self.umbral})"
+
+
+class DriftMonitor:
+    """Compara las estadísticas acumuladas contra los valores de entrenamiento.
+
+    La referencia numérica por defecto es la media y desviación del scaler;
+    la de categorías se obtiene de un lote de confianza guardado con
+    `save_reference` (el entrenamiento no dejó frecuencias guardadas).
+    """
+
+    def __init__(self, referencia, max_mean_shift=0.25, max_std_ratio=2.0, max_psi=0.2):
+        self.referencia = referencia
+        self.max_mean_shift = max_mean_shift
+        self.max_std_ratio = max_std_ratio
+        self.max_psi = max_psi
+        self.stats = StreamingStats()
+
+    @classmethod
+    def from_artifacts(cls, directorio='.', **kwargs):
+        _, scaler, columnas, _ = load_artifacts(directorio)
+        return cls.from_scaler(scaler, columnas, directorio, **kwargs)
+
+    @classmethod
+    def from_scaler(cls, scaler, columnas_modelo, directorio='.', **kwargs):
+        """Referencia a partir de un scaler ya cargado y del JSON guardado en `directorio`."""
+        nombres = scaler_feature_names(scaler, columnas_modelo)
+        referencia = {
+            'numericos': {c: {'mean': float(m), 'std': float(s)}
+                          for c, m, s in zip(nombres, scaler.mean_, scaler.scale_)},
+            'categoricos': {},
+        }
+        ruta = os.path.join(directorio, REFERENCIA_FILE)
+        if os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                guardada = json.load(f)
+            referencia['categoricos'] = guardada.get('categoricos', {})
+            referencia['numericos'] = {**guardada.get('numericos', {}), **referencia['numericos']}
+        return cls(referencia, **kwargs)
+
+    def update(self, leads):
+        """Acumula un lote y devuelve las alertas con todo lo visto hasta ahora."""
+        self.stats.update(leads)
+        return self.check()
+
+    def check(self):
+        alertas = []
+        for campo, ref in self.referencia.get('numericos', {}).items():
+            if campo not in self.stats.count or not self.stats.count[campo] or not ref['std']:
+                continue
+            shift = abs(self.stats.mean[campo] - ref['mean']) / ref['std']
+            if shift > self.max_mean_shift:
+                alertas.append(DriftAlert(campo, 'desplazamiento_media', shift, self.max_mean_shift))
+            ratio = np.sqrt(self.stats.variance(campo)) / ref['std']
+            if ratio > self.max_std_ratio or ratio < 1 / self.max_std_ratio:
+                alertas.append(DriftAlert(campo, 'ratio_desvio', ratio, self.max_std_ratio))
+
+        for campo, ref in self.referencia.get('categoricos', {}).items():
+            if campo not in self.stats.frecuencias or not self.stats.frecuencias[campo]:
+                continue
+            psi = population_stability_index(ref, self.stats.proportions(campo))
+            if psi > self.max_psi:
+                alertas.append(DriftAlert(campo, 'psi', psi, self.max_psi))
+        return alertas
+
+
+def population_stability_index(referencia, actual, epsilon=1e-4):
+    """PSI entre dos distribuciones de categorías dadas como {categoría: proporción}."""
+    categorias = set(referencia) | set(actual)
+    p = np.array([referencia.get(c, 0.0) for c in categorias]) + epsilon
+    q = np.array([actual.get(c, 0.0) for c in categorias]) + epsilon
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def save_reference(stats, directorio='.'):
+    ruta = os.path.join(directorio, REFERENCIA_FILE)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(stats.to_reference(), f, indent=2, ensure_ascii=False)
+    return ruta
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valida leads y monitorea drift frente al entrenamiento")
+    parser.add_argument('leads', help="CSV con los campos del formulario")
+    parser.add_argument('--modelo-dir', default='.', help="Directorio con los .pkl del modelo")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--guardar-referencia', action='store_true',
+                        help="Guardar las estadísticas de este lote como referencia de drift")
+    args = parser.parse_args(argv)
+
+    schema = LeadSchema.from_artifacts(args.modelo_dir)
+    monitor = DriftMonitor.from_artifacts(args.modelo_dir)
+
+    resumenes, n_leads, n_validos, n_puntuables = [], 0, 0, 0
+    for lote in pd.read_csv(args.leads, chunksize=args.chunk_size):
+        reporte = schema.validate(lote)
+        resumenes.append(reporte.summary())
+        n_leads += reporte.n_leads
+        n_validos += int(reporte.valid_mask().sum())
+        n_puntuables += int(reporte.scorable_mask().sum())
+        alertas = monitor.update(lote)
+
+    print(f"Leads: {n_leads} | válidos: {n_validos} | puntuables: {n_puntuables}")
+    if schema.campos_sin_codificacion:
+        print(f"⚠️ Campos cuya codificación no coincide con las columnas del modelo "
+              f"(defecto del esquema, no de los leads): {', '.join(schema.campos_sin_codificacion)}")
+    if resumenes:
+        resumen = pd.concat(resumenes).groupby(['campo', 'tipo'])['n'].sum()
+        if not resumen.empty:
+            print(resumen.to_string())
+        for alerta in alertas:
+            print(alerta)
+
+    if args.guardar_referencia:
+        print(f"Referencia guardada en {save_reference(monitor.stats, args.modelo_dir)}")
+
+
+if __name__ == '__main__':
+    main()